@@ -13,6 +13,7 @@ Edge Functions:
 Each function returns the name of the next node to execute.
 """
 
+from functools import lru_cache
 from typing import Literal
 from app.agent.state import AgentState
 
@@ -161,35 +162,39 @@ def get_routing_explanation(state: AgentState) -> str:
     Returns:
         String explaining the routing path
     """
+    return _explain_routing(
+        bool(state.get("error")),
+        bool(state.get("requires_consequence_check", False)),
+        bool(state.get("requires_confirmation", False)),
+        bool(state.get("user_confirmed", False)),
+    )
+
+
+@lru_cache(maxsize=16)  # One entry per combination of the four flags
+def _explain_routing(
+    has_error: bool,
+    requires_check: bool,
+    requires_conf: bool,
+    user_conf: bool
+) -> str:
+    """Build the routing explanation from the flags the routers read."""
     path = []
 
     # Start with classification
     path.append("START ' preprocess ' classify")
 
     # After classify
-    if state.get("error"):
+    if has_error:
         path.append(" ' format_response (error in classify)")
         return " ".join(path)
 
-    requires_check = state.get("requires_consequence_check", False)
     if requires_check:
         path.append(" ' check_consequences")
 
-        # After consequences
-        if state.get("error"):
-            path.append(" ' format_response (error in consequences)")
-            return " ".join(path)
-
-        requires_conf = state.get("requires_confirmation", False)
         if requires_conf:
             path.append(" ' request_confirmation")
 
             # After confirmation
-            if state.get("error"):
-                path.append(" ' format_response (error in confirmation)")
-                return " ".join(path)
-
-            user_conf = state.get("user_confirmed", False)
             if user_conf:
                 path.append(" ' execute_action")
             else:
@@ -0,0 +1,60 @@
+"""
+Shared HTTP client for the agent's LLM calls.
+
+The preprocess, classify, confirmation and format nodes each build an
+OpenRouterClient per request. Handing them one process-wide httpx.AsyncClient keeps the TCP/TLS
+connection to OpenRouter alive between calls instead of re-handshaking every
+time.
+"""
+
+import asyncio
+from typing import Optional
+
+import httpx
+
+# Connection pool limits for the shared client
+MAX_CONNECTIONS = 20
+MAX_KEEPALIVE_CONNECTIONS = 20
+KEEPALIVE_EXPIRY_SECONDS = 30
+
+# Generation can take a while, but a connect that hangs is a network problem
+# and should fail fast so the caller can fall back
+TIMEOUT_SECONDS = 120
+CONNECT_TIMEOUT_SECONDS = 5
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def get_client() -> httpx.AsyncClient:
+    """
+    Return the shared HTTP client, creating it on first use.
+
+    The client's connections belong to the event loop that opened them, so a
+    new client is created when called from a different loop (e.g. successive
+    asyncio.run() calls in the test scripts).
+    """
+    global _client, _client_loop
+
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(TIMEOUT_SECONDS, connect=CONNECT_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+            ),
+        )
+        _client_loop = loop
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared HTTP client, if one is open."""
+    global _client, _client_loop
+
+    if _client is not None and _client_loop is asyncio.get_running_loop():
+        await _client.aclose()
+    _client = None
+    _client_loop = None
@@ -8,6 +8,8 @@ LangGraph Agent Nodes (TICKET #5)
 4. request_confirmation_node - Generate confirmation message
 5. execute_action_node - Execute tools via TOOL_REGISTRY
 6. format_response_node - Format final response
+
+run_preclassify chains nodes 1-2 for callers that run them directly.
 """
 
 from app.agent.nodes.preprocess import preprocess_input_node
@@ -16,6 +18,7 @@ from app.agent.nodes.consequences import check_consequences_node
 from app.agent.nodes.confirmation import request_confirmation_node
 from app.agent.nodes.execute import execute_action_node
 from app.agent.nodes.format import format_response_node
+from app.agent.nodes.pipeline import run_preclassify
 
 __all__ = [
     "preprocess_input_node",
@@ -24,4 +27,5 @@ __all__ = [
     "request_confirmation_node",
     "execute_action_node",
     "format_response_node",
+    "run_preclassify",
 ]
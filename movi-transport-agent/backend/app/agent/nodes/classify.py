@@ -11,14 +11,31 @@ Responsibilities:
 5. Check if consequence analysis is needed
 """
 
-import json
 from typing import Dict, Any
 from app.agent.state import AgentState
 from app.agent.prompts import CLASSIFICATION_SYSTEM_PROMPT
-from app.utils.openrouter import OpenRouterClient
+from app.utils.llm_cache import RESPONSE_CACHE
+from app.agent.llm_client import get_client
+from app.utils.openrouter import OpenRouterClient, create_text_content
+from app.utils.serialization import JSONDecodeError, dumps_indented, loads
 from app.core.config import settings
 from app.schemas.tool import TOOL_METADATA_REGISTRY
 
+# Tab names and action phrases used in the wrong-page message
+PAGE_NAMES = {
+    "busDashboard": "🚌 Bus Dashboard",
+    "manageRoute": "🛣️ Manage Routes"
+}
+WRONG_PAGE_ACTIONS = {
+    "create_route": "create routes",
+    "create_path": "create paths",
+    "create_stop": "create stops",
+    "list_routes": "view routes",
+    "assign_vehicle": "assign vehicles to trips",
+    "remove_vehicle": "remove vehicles from trips",
+    "get_trip_status": "view trip details",
+}
+
 
 async def classify_intent_node(state: AgentState) -> Dict[str, Any]:
     """
@@ -63,7 +80,7 @@ async def classify_intent_node(state: AgentState) -> Dict[str, Any]:
 Current Page: {current_page} {"(Bus Dashboard - for trip management, vehicle assignments, bookings)" if current_page == "busDashboard" else "(Manage Routes - for creating/viewing routes and paths)" if current_page == "manageRoute" else ""}
 
 Preprocessed Input (from Gemini):
-{json.dumps(processed_input, indent=2)}
+{dumps_indented(processed_input)}
 
 Original User Input: "{user_input}"
 
@@ -76,12 +93,15 @@ IMPORTANT - Page Context Awareness:
 """
         
         messages = [
-            {"role": "system", "content": CLASSIFICATION_SYSTEM_PROMPT},
+            # The system prompt is the large static prefix; mark it for prompt caching
+            {"role": "system", "content": [create_text_content(CLASSIFICATION_SYSTEM_PROMPT, cache=True)]},
             {"role": "user", "content": user_message}
         ]
         
-        # Call Claude via OpenRouter
-        client = OpenRouterClient()
+        # Call Claude via OpenRouter. The cache key covers the full prompt (page,
+        # preprocessed input, user input), so repeated identical requests skip
+        # the round-trip and concurrent duplicates share one call.
+        client = OpenRouterClient(cache=RESPONSE_CACHE, http_client=await get_client())
         
         try:
             response = await client.chat_completion(
@@ -110,30 +130,17 @@ IMPORTANT - Page Context Awareness:
         elif "```" in content:
             content = content.split("```")[1].split("```")[0].strip()
         
-        classification = json.loads(content)
+        classification = loads(content)
 
         # Check if user is on wrong page
         if classification.get("wrong_page", False):
             suggested_page = classification.get("suggest_page", "")
-            page_names = {
-                "busDashboard": "🚌 Bus Dashboard",
-                "manageRoute": "🛣️ Manage Routes"
-            }
-            current_page_name = page_names.get(current_page, current_page)
-            suggested_page_name = page_names.get(suggested_page, suggested_page)
+            current_page_name = PAGE_NAMES.get(current_page, current_page)
+            suggested_page_name = PAGE_NAMES.get(suggested_page, suggested_page)
 
             # Get a clean action description
             intent = classification.get("intent", "")
-            action_descriptions = {
-                "create_route": "create routes",
-                "create_path": "create paths",
-                "create_stop": "create stops",
-                "list_routes": "view routes",
-                "assign_vehicle": "assign vehicles to trips",
-                "remove_vehicle": "remove vehicles from trips",
-                "get_trip_status": "view trip details",
-            }
-            action_desc = action_descriptions.get(intent, "perform this action")
+            action_desc = WRONG_PAGE_ACTIONS.get(intent, "perform this action")
 
             return {
                 "error": f"📍 You're currently on the '{current_page_name}' tab. Please switch to the '{suggested_page_name}' tab to {action_desc}.",
@@ -164,7 +171,7 @@ IMPORTANT - Page Context Awareness:
             "error": None,
         }
         
-    except json.JSONDecodeError as e:
+    except JSONDecodeError as e:
         return {
             "error": f"Failed to parse Claude response as JSON: {str(e)}",
             "error_node": "classify_intent_node"
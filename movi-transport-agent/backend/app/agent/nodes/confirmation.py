@@ -12,11 +12,12 @@ Responsibilities:
 Uses Claude Sonnet 4.5 via OpenRouter for natural language generation.
 """
 
-import json
 from typing import Dict, Any
 from app.agent.state import AgentState
 from app.agent.prompts import CONFIRMATION_SYSTEM_PROMPT
+from app.agent.llm_client import get_client
 from app.utils.openrouter import OpenRouterClient
+from app.utils.serialization import dumps_indented
 from app.core.config import settings
 
 
@@ -73,7 +74,7 @@ Action type: {action_type}
 Risk level: {risk_level.upper()}
 
 Consequences detected:
-{json.dumps(consequences, indent=2)}
+{dumps_indented(consequences)}
 
 Please generate a clear, concise confirmation message that:
 1. Explains what will happen
@@ -89,7 +90,7 @@ Keep it under 150 words and use simple, direct language.
         ]
 
         # Call Claude via OpenRouter
-        client = OpenRouterClient()
+        client = OpenRouterClient(http_client=await get_client())
 
         try:
             response = await client.chat_completion(
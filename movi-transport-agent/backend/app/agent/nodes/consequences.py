@@ -21,6 +21,7 @@ from typing import Dict, Any, Optional
 from sqlalchemy import select
 from app.agent.state import AgentState
 from app.tools.consequence_tools import get_consequences_for_action
+from app.tools.base import normalize_trip_time
 from app.api.deps import get_db
 from app.models.daily_trip import DailyTrip
 from app.models.route import Route
@@ -75,8 +76,7 @@ async def _resolve_trip_id(trip_identifier: Any, db: AsyncSession, context: Dict
             return _disambiguate_trips(trips, context)
 
         # Try partial match with normalized time (6:00 → 06:00)
-        import re
-        normalized_search = re.sub(r'\b(\d):(\d{2})\b', r'0\1:\2', trip_name_search)
+        normalized_search = normalize_trip_time(trip_name_search)
         result = await db.execute(
             select(DailyTrip).where(DailyTrip.display_name.ilike(f"%{normalized_search}%"))
         )
@@ -6,20 +6,53 @@ This node formats the final response for the user in natural language.
 Responsibilities:
 1. Take tool execution results or errors
 2. Format them into user-friendly messages
-3. Use Claude for natural language generation
+3. Use Claude for natural language generation (success responses only)
 4. Handle different response types (success, error, confirmation)
 5. Return formatted response ready for UI display
 
 Uses Claude Sonnet 4.5 via OpenRouter for natural language generation.
+Error, confirmation and info responses, and successful results of the
+tools in format_templates, are templated locally and never wait on the LLM.
 """
 
-import json
+from contextlib import aclosing
 from typing import Dict, Any
 from app.agent.state import AgentState
 from app.agent.prompts import RESPONSE_FORMAT_SYSTEM_PROMPT
-from app.utils.openrouter import OpenRouterClient
+from app.agent.llm_client import get_client
+from app.agent.nodes.format_templates import render_response
+from app.utils.llm_cache import LLMCache, RESPONSE_CACHE
+from app.utils.openrouter import OpenRouterClient, create_text_content
+from app.utils.serialization import dumps_indented
 from app.core.config import settings
 
+# Instructions for formatting a successful tool result; the request details
+# follow them in a separate content block
+FORMAT_INSTRUCTIONS = """Please generate a natural, conversational response to the request below that:
+1. Confirms what was done
+2. Presents key results clearly
+3. Uses simple language (avoid technical jargon)
+4. Keeps it concise (2-3 sentences)
+
+Format numbers nicely (e.g., "3 vehicles" not "count: 3").
+If there's a list, present top 2-3 items.
+"""
+
+# Per-request details sent after FORMAT_INSTRUCTIONS
+FORMAT_REQUEST_TEMPLATE = """
+User request: "{user_input}"
+
+Tool executed: {tool_name}
+Action type: {action_type}
+
+Tool results:
+{tool_results}
+"""
+
+# Sampling settings for the formatting call (also part of the cache key)
+FORMAT_TEMPERATURE = 0.1  # Lower for faster responses (optimization)
+FORMAT_MAX_TOKENS = 200  # Reduced for faster responses
+
 
 async def format_response_node(state: AgentState) -> Dict[str, Any]:
     """
@@ -58,7 +91,7 @@ async def format_response_node(state: AgentState) -> Dict[str, Any]:
 
         if error:
             # Format error response
-            return await _format_error_response(state, error, error_node)
+            return _format_error_response(state, error, error_node)
 
         # Check if waiting for confirmation
         requires_confirmation = state.get("requires_confirmation", False)
@@ -82,7 +115,7 @@ async def format_response_node(state: AgentState) -> Dict[str, Any]:
         if execution_success is False:
             # Tool execution failed
             execution_error = state.get("execution_error", "Unknown error")
-            return await _format_error_response(
+            return _format_error_response(
                 state,
                 execution_error,
                 "execute_action_node"
@@ -99,7 +132,7 @@ async def format_response_node(state: AgentState) -> Dict[str, Any]:
 
         # No tool execution (info request or clarification)
         intent = state.get("intent", "")
-        return await _format_info_response(state, intent, user_input)
+        return _format_info_response(state, intent, user_input)
 
     except Exception as e:
         # Fallback error handling
@@ -119,13 +152,23 @@ async def _format_success_response(
     """
     Format successful tool execution into natural language.
 
-    Uses Claude to generate a conversational response that:
+    Tools with a response template are rendered locally. For the rest, uses
+    Claude to generate a conversational response that:
     - Acknowledges the user's request
     - Presents the results clearly
     - Provides relevant details from tool output
     - Suggests next actions if appropriate
     """
     try:
+        templated = render_response(tool_name, tool_results)
+        if templated is not None:
+            return {
+                "response": templated,
+                "response_type": "success",
+                "error": None,
+                "tool_results": tool_results,  # Pass through for API metadata
+            }
+
         # Build context for Claude
         context = {
             "user_input": user_input,
@@ -135,60 +178,53 @@ async def _format_success_response(
             "action_type": state.get("action_type", ""),
         }
 
-        user_message = f"""
-User request: "{user_input}"
-
-Tool executed: {tool_name}
-Action type: {context['action_type']}
-
-Tool results:
-{json.dumps(tool_results, indent=2)}
-
-Please generate a natural, conversational response that:
-1. Confirms what was done
-2. Presents key results clearly
-3. Uses simple language (avoid technical jargon)
-4. Keeps it concise (2-3 sentences)
-
-Format numbers nicely (e.g., "3 vehicles" not "count: 3").
-If there's a list, present top 2-3 items.
-"""
+        user_message = FORMAT_REQUEST_TEMPLATE.format(
+            user_input=user_input,
+            tool_name=tool_name,
+            action_type=context["action_type"],
+            tool_results=dumps_indented(tool_results),
+        )
 
+        # Static text first, so the system prompt and instructions form a
+        # prefix that is identical on every call and can be served from cache
         messages = [
-            {"role": "system", "content": RESPONSE_FORMAT_SYSTEM_PROMPT},
-            {"role": "user", "content": user_message}
+            {"role": "system", "content": [create_text_content(RESPONSE_FORMAT_SYSTEM_PROMPT)]},
+            {"role": "user", "content": [
+                create_text_content(FORMAT_INSTRUCTIONS, cache=True),
+                create_text_content(user_message),
+            ]}
         ]
 
-        # Call Claude via OpenRouter
-        client = OpenRouterClient()
+        # Identical tool output for the same request formats the same way;
+        # serve it from the response cache instead of streaming it again
+        cache_key = LLMCache.make_key(
+            settings.CLAUDE_MODEL, messages, FORMAT_TEMPERATURE, FORMAT_MAX_TOKENS
+        )
+        cached = await RESPONSE_CACHE.get(cache_key) if RESPONSE_CACHE else None
+        if cached is not None:
+            return {
+                "response": cached["choices"][0]["message"]["content"],
+                "response_type": "success",
+                "error": None,
+                "tool_results": tool_results,  # Pass through for API metadata
+            }
 
+        # Call Claude via OpenRouter. Concurrent requests with the same key
+        # (e.g. the same tool output formatted for several sessions at once)
+        # share one call through the response cache.
         try:
-            response = await client.chat_completion(
-                model=settings.CLAUDE_MODEL,
-                messages=messages,
-                temperature=0.1,  # Lower for faster responses (optimization)
-                max_tokens=200,  # Reduced for faster responses
-            )
+            if RESPONSE_CACHE is not None:
+                response = await RESPONSE_CACHE.coalesce(
+                    cache_key, lambda: _generate_response(messages)
+                )
+            else:
+                response = await _generate_response(messages)
         except Exception as e:
             # Fallback: Generate simple response without Claude
             return _generate_fallback_success_response(tool_results, tool_name)
 
-        await client.close()
-
-        # Extract formatted response
         formatted_response = response["choices"][0]["message"]["content"]
 
-        # Clean up response (remove any markdown)
-        if "```" in formatted_response:
-            parts = formatted_response.split("```")
-            formatted_response = parts[0].strip()
-            if not formatted_response and len(parts) > 2:
-                formatted_response = parts[-1].strip()
-
-        # Validate response
-        if not formatted_response or len(formatted_response) < 10:
-            return _generate_fallback_success_response(tool_results, tool_name)
-
         return {
             "response": formatted_response,
             "response_type": "success",
@@ -201,7 +237,64 @@ If there's a list, present top 2-3 items.
         return _generate_fallback_success_response(tool_results, tool_name)
 
 
-async def _format_error_response(
+async def _generate_response(messages: list) -> Dict[str, Any]:
+    """
+    Generate a formatted response with Claude.
+
+    Returns it in the same shape as a chat_completion response, so it can be
+    stored in the response cache. Raises ValueError if the cleaned-up text is
+    too short to use.
+    """
+    client = OpenRouterClient(http_client=await get_client())
+    formatted_response = await _stream_response_text(client, messages)
+    await client.close()
+
+    # Clean up response (remove any markdown)
+    if "```" in formatted_response:
+        parts = formatted_response.split("```")
+        formatted_response = parts[0].strip()
+        if not formatted_response and len(parts) > 2:
+            formatted_response = parts[-1].strip()
+
+    # Validate response
+    if not formatted_response or len(formatted_response) < 10:
+        raise ValueError(f"Formatted response too short: {formatted_response!r}")
+
+    return {"choices": [{"message": {"role": "assistant", "content": formatted_response}}]}
+
+
+async def _stream_response_text(client: OpenRouterClient, messages: list) -> str:
+    """
+    Stream Claude's formatted response and return its text.
+
+    If the reply opens a code block after some prose, the clean-up below keeps
+    only the prose, so stop reading there instead of waiting for the rest of
+    the generation.
+    """
+    text = ""
+    watch_for_fence = True
+
+    async with aclosing(client.stream_chat_completion(
+        model=settings.CLAUDE_MODEL,
+        messages=messages,
+        temperature=FORMAT_TEMPERATURE,
+        max_tokens=FORMAT_MAX_TOKENS,
+    )) as deltas:
+        async for delta in deltas:
+            text += delta
+            if not watch_for_fence:
+                continue
+            fence = text.find("```")
+            if fence != -1:
+                if text[:fence].strip():
+                    break
+                # Reply starts with a code block; the text after it is needed
+                watch_for_fence = False
+
+    return text
+
+
+def _format_error_response(
     state: AgentState,
     error: str,
     error_node: str
@@ -209,7 +302,7 @@ async def _format_error_response(
     """
     Format error into user-friendly message.
 
-    Translates technical errors into simple explanations.
+    Translates technical errors into simple explanations without calling Claude.
     """
     user_input = state.get("user_input", "your request")
 
@@ -273,7 +366,7 @@ async def _format_error_response(
     }
 
 
-async def _format_info_response(
+def _format_info_response(
     state: AgentState,
     intent: str,
     user_input: str
@@ -282,6 +375,7 @@ async def _format_info_response(
     Format informational response (no tool execution).
 
     Used for clarifications, help messages, or when no action is needed.
+    Templated locally; no Claude call.
     """
     message = f"I understand you want to: {intent}. How can I help you with this?"
 
@@ -0,0 +1,114 @@
+"""
+Response templates for the format node (TICKET #5 - Phase 4f)
+
+Successful results from the single-entity tools read the same way every time
+("Created stop X at lat, lon", "N unassigned vehicles"), so they are rendered
+here directly instead of asking Claude to phrase them. Templates are keyed by
+tool name and read the tool's data as returned by app/tools; if the data does
+not have the expected shape, render_response() returns None and the caller
+falls back to Claude.
+"""
+
+from typing import Any, Callable, Dict, Optional
+
+# How many list items to spell out before summarising the rest
+MAX_LISTED_ITEMS = 3
+
+
+def _plural(count: int, noun: str) -> str:
+    return f"{count} {noun}" if count == 1 else f"{count} {noun}s"
+
+
+def _unassigned_vehicles(data: Dict[str, Any]) -> str:
+    count = data["count"]
+    if count == 0:
+        return "All vehicles are currently assigned to trips."
+
+    vehicles = [
+        f"{v['license_plate']} ({v['type']}, {_plural(v['capacity'], 'seat')})"
+        for v in data["vehicles"][:MAX_LISTED_ITEMS]
+    ]
+    remaining = count - len(vehicles)
+    if remaining > 0:
+        vehicles.append(f"{remaining} more")
+    listed = vehicles[0] if len(vehicles) == 1 else f"{', '.join(vehicles[:-1])} and {vehicles[-1]}"
+
+    verb = "is" if count == 1 else "are"
+    return f"There {verb} {_plural(count, 'unassigned vehicle')}: {listed}."
+
+
+def _trip_status(data: Dict[str, Any]) -> str:
+    response = f"Trip '{data['display_name']}' is {data['booking_percentage']}% booked"
+    if data["live_status"]:
+        response += f" (status: {data['live_status']})"
+    response += "."
+    deployment = data["deployment"]
+    if deployment:
+        response += (
+            f" Vehicle {deployment['vehicle']['license_plate']} is assigned, "
+            f"driven by {deployment['driver']['name']}."
+        )
+    else:
+        response += " No vehicle is assigned yet."
+    return response
+
+
+def _stop_created(data: Dict[str, Any]) -> str:
+    return (
+        f"Done! I created the stop '{data['name']}' at "
+        f"{data['latitude']}, {data['longitude']} (stop ID {data['stop_id']})."
+    )
+
+
+def _path_created(data: Dict[str, Any]) -> str:
+    return (
+        f"Done! I created the path '{data['path_name']}' with "
+        f"{_plural(data['stop_count'], 'stop')}: {' → '.join(data['stop_names'])}."
+    )
+
+
+def _route_created(data: Dict[str, Any]) -> str:
+    return (
+        f"Done! I created the route '{data['route_display_name']}' on path "
+        f"'{data['path_name']}' ({data['direction']}, shift time {data['shift_time']})."
+    )
+
+
+def _vehicle_assigned(data: Dict[str, Any]) -> str:
+    driver = f" with driver {data['driver_name']}" if data["driver_name"] else ""
+    return f"Done! {data['vehicle_license']} is now assigned to trip '{data['trip_name']}'{driver}."
+
+
+def _vehicle_removed(data: Dict[str, Any]) -> str:
+    return (
+        f"Done! I removed vehicle {data['removed_vehicle_license']} "
+        f"from trip '{data['trip_name']}'."
+    )
+
+
+RESPONSE_TEMPLATES: Dict[str, Callable[[Dict[str, Any]], str]] = {
+    "get_unassigned_vehicles_count": _unassigned_vehicles,
+    "get_trip_status": _trip_status,
+    "create_stop": _stop_created,
+    "create_path": _path_created,
+    "create_route": _route_created,
+    "assign_vehicle_to_trip": _vehicle_assigned,
+    "remove_vehicle_from_trip": _vehicle_removed,
+}
+
+
+def render_response(tool_name: str, tool_results: Dict[str, Any]) -> Optional[str]:
+    """
+    Render a successful tool result from its template.
+
+    Returns None if the tool has no template, the result is not a success, or
+    its data is missing a field the template needs.
+    """
+    template = RESPONSE_TEMPLATES.get(tool_name)
+    if template is None or not tool_results.get("success"):
+        return None
+
+    try:
+        return template(tool_results["data"])
+    except (KeyError, IndexError, TypeError):
+        return None
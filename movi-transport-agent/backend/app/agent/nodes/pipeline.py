@@ -0,0 +1,31 @@
+"""
+Node pipeline helpers (TICKET #5)
+
+Chains nodes that always run back-to-back in the workflow so callers
+(tests, scripts) can run them with a single await instead of repeating
+the `result = await node(state); state.update(result)` sequence.
+"""
+
+from typing import Dict, Any
+from app.agent.state import AgentState
+from app.agent.nodes.preprocess import preprocess_input_node
+from app.agent.nodes.classify import classify_intent_node
+
+
+async def run_preclassify(state: AgentState) -> Dict[str, Any]:
+    """
+    Run preprocess_input_node followed by classify_intent_node.
+
+    Mirrors the unconditional preprocess -> classify edge of the graph.
+    Classification depends on the preprocessed input, so the two calls
+    stay sequential; the input state is not modified.
+
+    Args:
+        state: Current agent state with user_input and context
+
+    Returns:
+        Combined state update from both nodes (classify keys win on overlap)
+    """
+    preprocess_result = await preprocess_input_node(state)
+    classify_result = await classify_intent_node({**state, **preprocess_result})
+    return {**preprocess_result, **classify_result}
@@ -15,6 +15,24 @@ import re
 from typing import Dict, Any, List
 from app.agent.state import AgentState
 from app.multimodal.gemini_wrapper import GeminiMultimodalProcessor, MultimodalInput
+from app.agent.llm_client import get_client
+from app.utils.openrouter import OpenRouterClient
+
+# Entity patterns, compiled once at import
+# Vehicle IDs (patterns like MH-12-3456, KA-01-1234)
+VEHICLE_PATTERN = re.compile(r'\b[A-Z]{2}-\d{2}-[A-Z0-9]{4}\b', re.IGNORECASE)
+# Trip display names (patterns like "Bulk - 00:01", "Path Path - 00:02")
+# This matches: word(s) - time format
+TRIP_PATTERN = re.compile(r'\b(?:[A-Z][a-z]+(?: [A-Z][a-z]+)*)\s*-\s*\d{2}:\d{2}\b')
+# Path names (patterns like "Path-1", "Path-2")
+PATH_PATTERN = re.compile(r'\bPath-\d+\b', re.IGNORECASE)
+
+# Common stop names (from seed data)
+KNOWN_STOPS = (
+    "Gavipuram", "Peenya", "Temple", "BTM", "Hebbal",
+    "Madiwala", "Jayanagar", "Koramangala", "Electronic City", "Whitefield"
+)
+_KNOWN_STOPS_LOWER = tuple((stop, stop.lower()) for stop in KNOWN_STOPS)
 
 
 def extract_entities_from_text(text: str) -> Dict[str, Any]:
@@ -37,36 +55,29 @@ def extract_entities_from_text(text: str) -> Dict[str, Any]:
         "action_intent": "unknown"
     }
 
-    # Extract vehicle IDs (patterns like MH-12-3456, KA-01-1234)
-    vehicle_pattern = r'\b[A-Z]{2}-\d{2}-[A-Z0-9]{4}\b'
-    vehicles = re.findall(vehicle_pattern, text, re.IGNORECASE)
+    text_lower = text.lower()
+
+    # Extract vehicle IDs
+    vehicles = VEHICLE_PATTERN.findall(text)
     if vehicles:
         entities["vehicle_ids"] = vehicles
 
-    # Extract trip display names (patterns like "Bulk - 00:01", "Path Path - 00:02")
-    # This matches: word(s) - time format
-    trip_pattern = r'\b(?:[A-Z][a-z]+(?: [A-Z][a-z]+)*)\s*-\s*\d{2}:\d{2}\b'
-    trips = re.findall(trip_pattern, text)
+    # Extract trip display names
+    trips = TRIP_PATTERN.findall(text)
     if trips:
         entities["trip_ids"] = trips
 
-    # Common stop names (from seed data)
-    known_stops = [
-        "Gavipuram", "Peenya", "Temple", "BTM", "Hebbal",
-        "Madiwala", "Jayanagar", "Koramangala", "Electronic City", "Whitefield"
-    ]
-    for stop in known_stops:
-        if stop.lower() in text.lower():
+    # Extract known stop names
+    for stop, stop_lower in _KNOWN_STOPS_LOWER:
+        if stop_lower in text_lower:
             entities["stop_names"].append(stop)
 
-    # Extract path names (patterns like "Path-1", "Path-2")
-    path_pattern = r'\bPath-\d+\b'
-    paths = re.findall(path_pattern, text, re.IGNORECASE)
+    # Extract path names
+    paths = PATH_PATTERN.findall(text)
     if paths:
         entities["path_names"] = paths
 
     # Infer action intent from keywords
-    text_lower = text.lower()
     if any(word in text_lower for word in ["remove", "delete", "unassign"]):
         entities["action_intent"] = "remove_vehicle"
     elif any(word in text_lower for word in ["assign", "add", "deploy", "attach"]):
@@ -218,7 +229,9 @@ async def preprocess_input_node(state: AgentState) -> Dict[str, Any]:
         print(f"\n🚀 Calling GeminiMultimodalProcessor.process_multimodal_input()...")
         # Process with Gemini (only for multimodal)
         try:
-            processor = GeminiMultimodalProcessor()
+            processor = GeminiMultimodalProcessor(
+                OpenRouterClient(http_client=await get_client())
+            )
             processed_result = await processor.process_multimodal_input(multimodal_input)
             print(f"✅ Gemini processing complete!")
             print(f"   Extracted entities: {processed_result.get('extracted_entities', {})}")
@@ -75,9 +75,15 @@ def create_initial_state(
     user_input: str,
     session_id: str,
     context: Optional[Dict[str, Any]] = None,
-    multimodal_data: Optional[Dict[str, Any]] = None
+    multimodal_data: Optional[Dict[str, Any]] = None,
+    **overrides: Any
 ) -> AgentState:
-    """Create initial state for a new agent invocation."""
+    """
+    Create initial state for a new agent invocation.
+
+    Any extra keyword arguments are set on the state as-is, overriding the
+    defaults (e.g. intent=..., tool_name=... to start from a later node).
+    """
     return {
         "user_input": user_input,
         "session_id": session_id,
@@ -90,6 +96,7 @@ def create_initial_state(
         "user_confirmed": False,
         "execution_success": False,
         "requires_consequence_check": False,
+        **overrides,
     }
 
 
@@ -0,0 +1,27 @@
+"""
+Agent warm-up.
+
+The first agent request otherwise pays for importing the node modules (tool
+registry, models, multimodal wrappers), configuring the SQLAlchemy mappers
+and opening the first database connection. warm_up() does that ahead of
+time: at app startup, and before the phase 4 test runner starts its cases.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.orm import configure_mappers
+
+from app.agent.llm_client import get_client
+from app.core.database import AsyncSessionLocal
+
+
+async def warm_up() -> None:
+    """Import the agent nodes, configure mappers, open a DB connection and the LLM client."""
+    import app.agent.nodes  # noqa: F401  (imports every node and the tool registry)
+
+    configure_mappers()
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("SELECT 1"))
+
+    # Creates the shared HTTP client; the first LLM call still opens the connection
+    await get_client()
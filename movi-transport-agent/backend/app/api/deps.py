@@ -1,12 +1,41 @@
-from typing import AsyncGenerator
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncGenerator, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import AsyncSessionLocal
 
+# Session bound by bound_session(); get_db() hands it out instead of opening a new one
+_bound_session: ContextVar[Optional[AsyncSession]] = ContextVar("bound_session", default=None)
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Dependency for getting async database session"""
+    session = _bound_session.get()
+    if session is not None:
+        # Owned by bound_session(), which closes it
+        yield session
+        return
+
     async with AsyncSessionLocal() as session:
         try:
             yield session
         finally:
             await session.close()
+
+
+@asynccontextmanager
+async def bound_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Open one session and reuse it for every get_db() call in the current task.
+
+    Lets scripts and tests run several nodes (which each call get_db()) on a
+    single session. The binding is a ContextVar, so tasks started inside
+    the block inherit it; don't gather nodes under one binding, since an
+    AsyncSession can't be used concurrently.
+    """
+    async with AsyncSessionLocal() as session:
+        token = _bound_session.set(session)
+        try:
+            yield session
+        finally:
+            _bound_session.reset(token)
@@ -39,6 +39,12 @@ class Settings(BaseSettings):
     CLAUDE_TEMPERATURE: float = 0.1  # Lower for faster, more consistent responses
     CLAUDE_MAX_TOKENS: int = 2000  # Reduced for faster responses
 
+    # LLM response cache (exact-match on model + prompt)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TTL_DAYS: int = 7
+    LLM_CACHE_MAX_ENTRIES: int = 1000  # Least recently used entries are evicted past this
+    LLM_CACHE_PATH: Optional[str] = None  # JSON file to persist entries across runs
+
     @property
     def cors_origins_list(self) -> list[str]:
         """Parse CORS origins as list."""
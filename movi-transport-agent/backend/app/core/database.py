@@ -7,6 +7,9 @@ engine = create_async_engine(
     settings.DATABASE_URL,
     echo=True,  # Set to False in production
     future=True,
+    # Compiled-SQL cache entries (default 500); room for every tool and
+    # session query plus their variants, so none is recompiled after first use
+    query_cache_size=1200,
 )
 
 # Create async session factory
@@ -2,6 +2,7 @@
 Gemini 2.5 Wrapper for Multimodal Input Processing.
 Processes text, audio, image, and video inputs and outputs structured comprehension.
 """
+import asyncio
 import base64
 import json
 from typing import Dict, List, Any, Optional, Union
@@ -206,6 +207,28 @@ Respond in JSON format with this structure:
                 "error": str(e)
             }
 
+    async def process_batch(
+        self,
+        inputs: List[MultimodalInput]
+    ) -> List[Dict[str, Any]]:
+        """
+        Process several independent inputs concurrently.
+
+        Each input is still its own OpenRouter request, but all of them share
+        this processor's HTTP client and run together, so the batch takes
+        roughly as long as the slowest request instead of the sum.
+
+        Args:
+            inputs: The multimodal inputs to process
+
+        Returns:
+            One result dictionary per input (same shape as
+            process_multimodal_input), in input order
+        """
+        return list(await asyncio.gather(
+            *(self.process_multimodal_input(multimodal_input) for multimodal_input in inputs)
+        ))
+
     def _determine_modality(self, multimodal_input: MultimodalInput) -> str:
         """Determine the input modality."""
         modalities = []
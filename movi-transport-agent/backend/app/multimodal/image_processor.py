@@ -10,7 +10,8 @@ from .gemini_wrapper import GeminiMultimodalProcessor, MultimodalInput
 async def analyze_screenshot(
     image_file: Union[str, Path],
     user_query: Optional[str] = None,
-    current_page: str = "busDashboard"
+    current_page: str = "busDashboard",
+    processor: Optional[GeminiMultimodalProcessor] = None
 ) -> Dict[str, Any]:
     """
     Analyze a screenshot of the transport management UI.
@@ -25,6 +26,8 @@ async def analyze_screenshot(
         image_file: Path to image file or URL
         user_query: Optional text query about the image
         current_page: Current UI page context
+        processor: Optional processor to reuse. If not provided, a new one is
+            created and closed after the call; a passed-in one is left open.
 
     Returns:
         Dictionary with analysis results:
@@ -39,7 +42,9 @@ async def analyze_screenshot(
             "modality": "image"
         }
     """
-    processor = GeminiMultimodalProcessor()
+    owns_processor = processor is None
+    if owns_processor:
+        processor = GeminiMultimodalProcessor()
 
     try:
         prompt = user_query or (
@@ -62,7 +67,8 @@ async def analyze_screenshot(
         return result
 
     finally:
-        await processor.close()
+        if owns_processor:
+            await processor.close()
 
 
 async def extract_ui_elements(
@@ -8,8 +8,10 @@ Handles all session-related operations including:
 - State persistence
 """
 
+import asyncio
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
+from weakref import WeakValueDictionary
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete
 from sqlalchemy.sql import func
@@ -24,6 +26,18 @@ logger = get_logger(__name__)
 SESSION_TTL_HOURS = 24  # Sessions expire after 24 hours of inactivity
 CLEANUP_BATCH_SIZE = 100  # Number of sessions to clean up per run
 
+# Per-session locks for the read-modify-write of conversation_history. A lock
+# lives only while some request holds or waits on it.
+_session_locks: "WeakValueDictionary[str, asyncio.Lock]" = WeakValueDictionary()
+
+
+def _session_lock(session_id: str) -> asyncio.Lock:
+    """Return the lock serializing updates to one session."""
+    lock = _session_locks.get(session_id)
+    if lock is None:
+        lock = _session_locks[session_id] = asyncio.Lock()
+    return lock
+
 
 class SessionService:
     """Service for managing agent sessions."""
@@ -50,7 +64,26 @@ class SessionService:
 
         Returns:
             Updated AgentSession object
+
+        Concurrent calls for the same session_id (several messages in flight
+        in one conversation) run one at a time, so no turn is lost and the
+        first message's insert does not race another.
         """
+        async with _session_lock(session_id):
+            return await SessionService._create_or_update_session(
+                session_id, user_input, agent_response, context, current_state, user_id
+            )
+
+    @staticmethod
+    async def _create_or_update_session(
+        session_id: str,
+        user_input: str,
+        agent_response: str,
+        context: Dict[str, Any],
+        current_state: Dict[str, Any],
+        user_id: Optional[str]
+    ) -> AgentSession:
+        """Body of create_or_update_session; caller holds the session lock."""
         async for db in get_db():
             try:
                 # Try to get existing session
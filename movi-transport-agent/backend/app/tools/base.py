@@ -9,8 +9,12 @@ All tool functions follow a consistent return format:
     "error": str (if not success)
 }
 """
+import re
 from typing import Dict, Any, Optional
 
+# Single-digit hour in a trip time, e.g. the "6:00" in "Bulk - 6:00"
+_SHORT_HOUR_PATTERN = re.compile(r'\b(\d):(\d{2})\b')
+
 
 def success_response(data: Any, message: str = "Operation successful") -> Dict[str, Any]:
     """
@@ -63,3 +67,16 @@ def validate_required_params(params: Dict[str, Any], required: list[str]) -> Opt
     if missing:
         return f"Missing required parameters: {', '.join(missing)}"
     return None
+
+
+def normalize_trip_time(trip_name: str) -> str:
+    """
+    Zero-pad single-digit hours in a trip name (6:00 → 06:00).
+
+    Args:
+        trip_name: Trip display name as typed by the user
+
+    Returns:
+        Trip name with times in the HH:MM format used by display_name
+    """
+    return _SHORT_HOUR_PATTERN.sub(r'0\1:\2', trip_name)
@@ -15,7 +15,7 @@ from app.models.daily_trip import DailyTrip
 from app.models.stop import Stop
 from app.models.path import Path
 from app.models.route import Route
-from .base import success_response, error_response
+from .base import success_response, error_response, normalize_trip_time
 
 
 async def assign_vehicle_to_trip(
@@ -72,8 +72,7 @@ async def assign_vehicle_to_trip(
                 # If still no match, try partial match (for time format variations like "6:00" vs "06:00")
                 if not trip:
                     # Normalize time format in search string (6:00 → 06:00)
-                    import re
-                    normalized_search = re.sub(r'\b(\d):(\d{2})\b', r'0\1:\2', trip_name_search)
+                    normalized_search = normalize_trip_time(trip_name_search)
 
                     trip_lookup_result = await db.execute(
                         select(DailyTrip).where(DailyTrip.display_name.ilike(f"%{normalized_search}%"))
@@ -298,8 +297,9 @@ async def create_stop(
             longitude=longitude
         )
         db.add(stop)
+        # stop_id is filled in by the INSERT and the session keeps loaded
+        # attributes after commit, so no refresh SELECT is needed
         await db.commit()
-        await db.refresh(stop)
 
         return success_response(
             data={
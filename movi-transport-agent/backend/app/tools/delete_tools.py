@@ -10,7 +10,7 @@ from sqlalchemy import select, delete
 from app.models.deployment import Deployment
 from app.models.daily_trip import DailyTrip
 from app.models.vehicle import Vehicle
-from .base import success_response, error_response
+from .base import success_response, error_response, normalize_trip_time
 
 
 async def remove_vehicle_from_trip(trip_id, db: AsyncSession) -> Dict[str, Any]:
@@ -66,8 +66,7 @@ async def remove_vehicle_from_trip(trip_id, db: AsyncSession) -> Dict[str, Any]:
                 # If still no match, try partial match (for time format variations like "6:00" vs "06:00")
                 if not trip:
                     # Normalize time format in search string (6:00 → 06:00)
-                    import re
-                    normalized_search = re.sub(r'\b(\d):(\d{2})\b', r'0\1:\2', trip_name_search)
+                    normalized_search = normalize_trip_time(trip_name_search)
 
                     trip_lookup_result = await db.execute(
                         select(DailyTrip).where(DailyTrip.display_name.ilike(f"%{normalized_search}%"))
@@ -87,33 +86,27 @@ async def remove_vehicle_from_trip(trip_id, db: AsyncSession) -> Dict[str, Any]:
                     )
                 trip_id = trip.trip_id
 
-        # Verify trip exists (if we have an int ID)
+        # Verify trip exists and get deployment info before deleting, in one query
         trip_result = await db.execute(
-            select(DailyTrip).where(DailyTrip.trip_id == trip_id)
+            select(DailyTrip, Deployment, Vehicle)
+            .outerjoin(Deployment, Deployment.trip_id == DailyTrip.trip_id)
+            .outerjoin(Vehicle, Deployment.vehicle_id == Vehicle.vehicle_id)
+            .where(DailyTrip.trip_id == trip_id)
         )
-        trip = trip_result.scalar_one_or_none()
-        if not trip:
+        trip_row = trip_result.first()
+        if not trip_row:
             return error_response(
                 error=f"Trip ID {trip_id} not found",
                 message="Trip not found in database"
             )
 
-        # Get deployment info before deleting
-        deployment_result = await db.execute(
-            select(Deployment, Vehicle)
-            .join(Vehicle, Deployment.vehicle_id == Vehicle.vehicle_id)
-            .where(Deployment.trip_id == trip_id)
-        )
-        deployment_row = deployment_result.first()
-
-        if not deployment_row:
+        trip, deployment, vehicle = trip_row
+        if deployment is None or vehicle is None:
             return error_response(
                 error=f"No vehicle assigned to trip '{trip.display_name}'",
                 message="Trip has no deployment to remove"
             )
 
-        deployment, vehicle = deployment_row
-
         # Delete deployment
         await db.execute(
             delete(Deployment).where(Deployment.trip_id == trip_id)
@@ -0,0 +1,250 @@
+"""
+LLM response cache for OpenRouter chat completions.
+
+Identical requests (same model, messages, temperature and max_tokens) are
+served from the cache instead of paying the network + model round-trip.
+Entries live in memory and can optionally be persisted to a JSON file so
+repeated test runs reuse earlier responses.
+
+RESPONSE_CACHE is the process-wide instance the agent nodes share, configured
+by the LLM_CACHE_* settings (None when the cache is disabled).
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from functools import wraps
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCache:
+    """
+    Async key/value cache for LLM responses with per-entry TTL.
+
+    Backed by an in-memory LRU of at most max_entries entries; if a path is
+    given, entries are loaded from and written back to that JSON file.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        default_ttl: int = 86400,
+        max_entries: int = 1000
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            path: Optional JSON file used to persist entries across runs
+            default_ttl: Entry lifetime in seconds when set() gets no ttl
+            max_entries: Most entries kept; the least recently used go first
+        """
+        self.path = Path(path) if path else None
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0}
+        # Least recently used first
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = asyncio.Lock()
+        # Serializes writes of the backing file; _dirty marks unwritten changes
+        self._persist_lock = asyncio.Lock()
+        self._dirty = False
+        # key -> future for a request currently being fetched (single-flight)
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        if self.path and self.path.exists():
+            try:
+                self._entries = OrderedDict(json.loads(self.path.read_text()))
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Ignoring unreadable LLM cache file {self.path}: {e}")
+            self._prune()
+
+    @staticmethod
+    def make_key(
+        model: str,
+        messages: List[Dict[str, Any]],
+        temperature: float,
+        max_tokens: Optional[int]
+    ) -> str:
+        """Build a stable SHA-256 key for a chat completion request."""
+        payload = json.dumps(
+            {
+                "model": model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response for key, or None if missing/expired."""
+        async with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+
+            if entry["expires_at"] < time.time():
+                del self._entries[key]
+                self.stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry["value"]
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """Store a response under key."""
+        async with self._lock:
+            self._entries[key] = {
+                "value": value,
+                "expires_at": time.time() + (ttl or self.default_ttl),
+            }
+            self._entries.move_to_end(key)
+            self._prune()
+        await self._persist()
+
+    async def delete(self, key: str) -> None:
+        """Remove a single entry."""
+        async with self._lock:
+            removed = self._entries.pop(key, None) is not None
+        if removed:
+            await self._persist()
+
+    async def clear(self) -> None:
+        """Remove all entries."""
+        async with self._lock:
+            self._entries.clear()
+        await self._persist()
+
+    async def coalesce(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Fetch and cache the value for key, sharing one fetch between callers.
+
+        Concurrent callers for the same key await the first caller's fetch
+        instead of starting their own; if it raises, they all get the error
+        and nothing is cached. If the first caller is cancelled instead, the
+        others are not: one of them starts the fetch again. Callers check
+        get() first.
+        """
+        while True:
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # Only retry if it was the fetching caller that got cancelled
+                if not inflight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await fetch()
+            await self.set(key, value)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved; waiters (if any) still get the error
+            raise
+        except BaseException:
+            # Cancelled (or interrupted): waiters fetch again rather than fail
+            future.cancel()
+            raise
+        finally:
+            del self._inflight[key]
+
+    def _prune(self) -> None:
+        """Drop expired entries, then the least recently used over max_entries."""
+        now = time.time()
+        for key in [k for k, entry in self._entries.items() if entry["expires_at"] < now]:
+            del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _persist(self) -> None:
+        """
+        Write entries to the backing file, if any, in a worker thread.
+
+        Each write takes a fresh snapshot, so changes made while a write is
+        running are picked up by the next one; callers that queued behind it
+        find nothing left to write and return.
+        """
+        if self.path is None:
+            return
+        self._dirty = True
+        async with self._persist_lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            await asyncio.to_thread(self._write_file, dict(self._entries))
+
+    def _write_file(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        """Replace the backing file with entries (via a temp file, atomically)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(entries))
+        os.replace(tmp_path, self.path)
+
+
+RESPONSE_CACHE: Optional[LLMCache] = (
+    LLMCache(
+        settings.LLM_CACHE_PATH,
+        default_ttl=settings.LLM_CACHE_TTL_DAYS * 86400,
+        max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+    )
+    if settings.LLM_CACHE_ENABLED
+    else None
+)
+
+
+def cached_llm_call(func):
+    """
+    Decorator for OpenRouterClient.chat_completion that consults self.cache.
+
+    Streaming requests and clients without a cache pass straight through.
+    Concurrent identical misses are coalesced (see LLMCache.coalesce).
+    """
+
+    @wraps(func)
+    async def wrapper(
+        self,
+        messages: List[Dict[str, Any]],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        stream: bool = False
+    ) -> Dict[str, Any]:
+        cache: Optional[LLMCache] = getattr(self, "cache", None)
+        if cache is None or stream:
+            return await func(self, messages, model, temperature, max_tokens, stream)
+
+        key = LLMCache.make_key(
+            model or self.config.default_model, messages, temperature, max_tokens
+        )
+        cached = await cache.get(key)
+        if cached is not None:
+            return cached
+
+        return await cache.coalesce(
+            key, lambda: func(self, messages, model, temperature, max_tokens, stream)
+        )
+
+    return wrapper
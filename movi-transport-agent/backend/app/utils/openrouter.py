@@ -3,9 +3,33 @@ OpenRouter API client for multimodal LLM requests.
 Supports text, image, audio, and video inputs via the OpenRouter API.
 """
 import httpx
-from typing import List, Dict, Any, Optional
+import logging
+import time
+from typing import AsyncIterator, ClassVar, List, Dict, Any, Optional, Tuple
 from pydantic import BaseModel
 
+from app.utils.llm_cache import LLMCache, cached_llm_call
+from app.utils.serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+# How long a model that failed with a server/transport error is skipped
+MODEL_COOLDOWN_SECONDS = 60
+
+# Status codes that mean the model itself is unavailable, not that the request was bad
+_MODEL_UNAVAILABLE_STATUSES = frozenset({404, 429})
+
+
+class ModelUnavailable(Exception):
+    """Raised when a model is in its failure cooldown and is not called."""
+
+    def __init__(self, model: str, retry_at: float):
+        self.model = model
+        self.retry_at = retry_at
+        super().__init__(
+            f"Model {model} is unavailable for another {max(retry_at - time.monotonic(), 0):.0f}s"
+        )
+
 
 class OpenRouterConfig(BaseModel):
     """Configuration for OpenRouter API client."""
@@ -24,14 +48,31 @@ class OpenRouterClient:
     - Image inputs (URL or base64)
     - Audio inputs (base64 only)
     - Video inputs (URL or base64)
+
+    Models that fail with a transport error, 5xx, 404 or 429 are remembered
+    process-wide for MODEL_COOLDOWN_SECONDS; calls to them in that window
+    raise ModelUnavailable immediately so callers can fall back without
+    waiting on another timeout.
     """
 
-    def __init__(self, config: Optional[OpenRouterConfig] = None):
+    # model -> time.monotonic() until which the model is skipped
+    _unhealthy_models: ClassVar[Dict[str, float]] = {}
+
+    def __init__(
+        self,
+        config: Optional[OpenRouterConfig] = None,
+        cache: Optional[LLMCache] = None,
+        http_client: Optional[httpx.AsyncClient] = None
+    ):
         """
         Initialize OpenRouter client.
 
         Args:
             config: Optional configuration. If not provided, uses settings from config.
+            cache: Optional response cache. Identical non-streaming requests are
+                served from it instead of calling the API.
+            http_client: Optional shared HTTP client. It is borrowed, not owned:
+                close() leaves it open for other callers.
         """
         if config is None:
             from app.core.config import settings
@@ -40,8 +81,11 @@ class OpenRouterClient:
             config = OpenRouterConfig(api_key=settings.OPENROUTER_API_KEY)
 
         self.config = config
-        self.client = httpx.AsyncClient(timeout=config.timeout)
+        self.cache = cache
+        self._owns_client = http_client is None
+        self.client = http_client or httpx.AsyncClient(timeout=config.timeout)
 
+    @cached_llm_call
     async def chat_completion(
         self,
         messages: List[Dict[str, Any]],
@@ -64,8 +108,84 @@ class OpenRouterClient:
             Response dictionary from OpenRouter API
 
         Raises:
+            ModelUnavailable: If the model failed recently and is cooling down
             httpx.HTTPError: If the request fails
         """
+        model, url, headers, payload = self._prepare_request(
+            messages, model, temperature, max_tokens, stream
+        )
+
+        try:
+            response = await self.client.post(url, headers=headers, content=dumps(payload))
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            self._record_failure(model, e)
+            raise
+
+        return loads(response.content)
+
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict[str, Any]],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a chat completion from OpenRouter, yielding content deltas.
+
+        Responses are not cached. Close the generator (e.g. with
+        contextlib.aclosing) to stop early; that also closes the HTTP stream.
+
+        Args:
+            messages: List of message dictionaries following OpenAI format
+            model: Model to use (defaults to config.default_model)
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+
+        Yields:
+            Text fragments of the assistant message, in order
+
+        Raises:
+            ModelUnavailable: If the model failed recently and is cooling down
+            httpx.HTTPError: If the request fails
+        """
+        model, url, headers, payload = self._prepare_request(
+            messages, model, temperature, max_tokens, stream=True
+        )
+
+        try:
+            async with self.client.stream("POST", url, headers=headers, content=dumps(payload)) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    # Server-sent events; lines starting with ":" are keep-alive comments
+                    if not line.startswith("data: "):
+                        continue
+                    data = line[len("data: "):]
+                    if data == "[DONE]":
+                        break
+                    choices = loads(data).get("choices") or [{}]
+                    content = choices[0].get("delta", {}).get("content")
+                    if content:
+                        yield content
+        except httpx.HTTPError as e:
+            self._record_failure(model, e)
+            raise
+
+    def _prepare_request(
+        self,
+        messages: List[Dict[str, Any]],
+        model: Optional[str],
+        temperature: float,
+        max_tokens: Optional[int],
+        stream: bool
+    ) -> Tuple[str, str, Dict[str, str], Dict[str, Any]]:
+        """Check the model is not cooling down and build (model, url, headers, payload)."""
+        model = model or self.config.default_model
+        retry_at = self._unhealthy_models.get(model, 0.0)
+        if retry_at > time.monotonic():
+            raise ModelUnavailable(model, retry_at)
+
         url = f"{self.config.base_url}/chat/completions"
         headers = {
             "Authorization": f"Bearer {self.config.api_key}",
@@ -75,7 +195,7 @@ class OpenRouterClient:
         }
 
         payload = {
-            "model": model or self.config.default_model,
+            "model": model,
             "messages": messages,
             "temperature": temperature,
         }
@@ -86,14 +206,32 @@ class OpenRouterClient:
         if stream:
             payload["stream"] = True
 
-        response = await self.client.post(url, headers=headers, json=payload)
-        response.raise_for_status()
+        return model, url, headers, payload
 
-        return response.json()
+    @classmethod
+    def _record_failure(cls, model: str, error: httpx.HTTPError) -> None:
+        """Mark model unhealthy if error means the model, not the request, is at fault."""
+        if isinstance(error, httpx.HTTPStatusError):
+            status = error.response.status_code
+            if status >= 500 or status in _MODEL_UNAVAILABLE_STATUSES:
+                cls._mark_unhealthy(model, f"HTTP {status}")
+        elif isinstance(error, httpx.TransportError):
+            cls._mark_unhealthy(model, type(error).__name__)
+
+    @classmethod
+    def _mark_unhealthy(cls, model: str, reason: str) -> None:
+        """Skip model for MODEL_COOLDOWN_SECONDS after a failure."""
+        cls._unhealthy_models[model] = time.monotonic() + MODEL_COOLDOWN_SECONDS
+        logger.warning(f"Model {model} failed ({reason}); skipping it for {MODEL_COOLDOWN_SECONDS}s")
 
     async def close(self):
-        """Close the HTTP client."""
-        await self.client.aclose()
+        """Close the HTTP client, unless it was passed in as a shared one."""
+        if self.cache is not None:
+            logger.info(
+                f"LLM cache: {self.cache.stats['hits']} hits, {self.cache.stats['misses']} misses"
+            )
+        if self._owns_client:
+            await self.client.aclose()
 
     async def __aenter__(self):
         """Async context manager entry."""
@@ -104,20 +242,26 @@ class OpenRouterClient:
         await self.close()
 
 
-def create_text_content(text: str) -> Dict[str, str]:
+def create_text_content(text: str, cache: bool = False) -> Dict[str, Any]:
     """
     Create a text content object.
 
     Args:
         text: The text content
+        cache: Mark the end of a static prompt prefix for provider-side prompt
+            caching (Anthropic-style cache_control; ignored by providers that
+            cache automatically)
 
     Returns:
         Content dict with type "text"
     """
-    return {
+    content = {
         "type": "text",
         "text": text
     }
+    if cache:
+        content["cache_control"] = {"type": "ephemeral"}
+    return content
 
 
 def create_image_content(image_data: str, is_url: bool = True) -> Dict[str, Any]:
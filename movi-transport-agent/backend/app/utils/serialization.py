@@ -0,0 +1,34 @@
+"""
+JSON helpers backed by orjson.
+
+Used on the agent's hot paths: encoding OpenRouter request bodies, embedding
+state (processed input, consequences, tool results) into LLM prompts and
+parsing the API's and the model's JSON replies.
+"""
+
+from typing import Any, Union
+
+import orjson
+
+# Same error type json.loads raises (orjson's subclasses json.JSONDecodeError)
+JSONDecodeError = orjson.JSONDecodeError
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize obj as compact JSON bytes, e.g. for a request body."""
+    return orjson.dumps(obj)
+
+
+def dumps_indented(obj: Any) -> str:
+    """
+    Serialize obj as 2-space indented JSON text for a prompt.
+
+    Non-string dict keys are converted to strings, and datetimes are written
+    in ISO 8601 format.
+    """
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON text or bytes."""
+    return orjson.loads(data)
@@ -0,0 +1,21 @@
+"""
+pytest configuration for the backend test suite.
+
+Makes the backend directory importable (so tests can `import app...`), as
+well as tests/ itself for shared helpers such as test_cleanup and
+fixture_cache, and loads .env once per session, before any test module
+imports app settings.
+"""
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+for path in (BACKEND_DIR, BACKEND_DIR / "tests"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+load_dotenv(dotenv_path=BACKEND_DIR / ".env")
+load_dotenv(dotenv_path=BACKEND_DIR / "tests" / ".env")
@@ -1,12 +1,26 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api.v1 import api_router
+from app.agent.llm_client import close_client
+from app.agent.warmup import warm_up
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm the agent up on startup; close the shared LLM HTTP client on shutdown."""
+    await warm_up()
+    yield
+    await close_client()
+
 
 # Create FastAPI app
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -0,0 +1,38 @@
+"""
+On-disk cache for remote test fixtures.
+
+Multimodal tests reference public sample images. Downloading them once into
+tests/fixtures/ and passing the local path keeps later runs off the network.
+"""
+import hashlib
+from pathlib import Path
+
+import httpx
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures"
+
+# Wikimedia rejects requests without a descriptive User-Agent
+_USER_AGENT = "movi-transport-agent-tests/1.0"
+
+
+def cached_fixture(url: str) -> Path:
+    """
+    Return a local copy of url, downloading it on first use.
+
+    Files are named by the URL's SHA-256 and keep its extension, so the
+    image MIME type can still be inferred from the path.
+
+    Args:
+        url: Remote fixture URL
+
+    Returns:
+        Path to the cached file under tests/fixtures/
+    """
+    digest = hashlib.sha256(url.encode()).hexdigest()[:16]
+    target = FIXTURE_DIR / f"{digest}{Path(url.split('?', 1)[0]).suffix}"
+    if not target.exists():
+        response = httpx.get(url, headers={"User-Agent": _USER_AGENT}, follow_redirects=True, timeout=30)
+        response.raise_for_status()
+        FIXTURE_DIR.mkdir(exist_ok=True)
+        target.write_bytes(response.content)
+    return target
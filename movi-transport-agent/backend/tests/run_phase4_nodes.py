@@ -0,0 +1,49 @@
+"""
+Run the phase 4c, 4e and 4f node tests together on one event loop.
+
+Running each file with its own asyncio.run() sets up the database pool and
+the shared LLM HTTP client three times. Here the three test mains run
+concurrently after a single warm-up, so that setup happens once, up front,
+instead of being charged to whichever case runs first. The modules touch
+disjoint data: 4c seeds its own trip and reads Bulk - 00:01, 4e writes trip 6
+and a new stop, and 4f only formats responses.
+
+Usage:
+    python tests/run_phase4_nodes.py
+
+Exit code is non-zero if any module fails. With TEST_LOG=INFO the per-step
+output of the modules interleaves.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+for path in (BACKEND_DIR, BACKEND_DIR / "tests"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import test_phase4c_consequences
+import test_phase4e_execute
+import test_phase4f_format
+from app.agent.llm_client import close_client
+from app.agent.warmup import warm_up
+from app.core.database import engine
+
+MODULES = (test_phase4c_consequences, test_phase4e_execute, test_phase4f_format)
+
+
+async def main() -> int:
+    """Run the module mains concurrently and return the worst exit code."""
+    try:
+        await warm_up()
+        exit_codes = await asyncio.gather(*(module.main() for module in MODULES))
+    finally:
+        await close_client()
+        await engine.dispose()
+    return max(exit_codes)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -52,5 +52,5 @@ else
     exit 1
 fi
 
-echo -e "\n${BLUE}Test results saved to: test_results_v2.json${NC}"
-echo -e "${BLUE}For detailed analysis, review the test_results_v2.json file${NC}\n"
+echo -e "\n${BLUE}Test results saved to: test_results_v2.ndjson (summary: test_results_v2_summary.json)${NC}"
+echo -e "${BLUE}For detailed analysis, review the test_results_v2.ndjson file${NC}\n"
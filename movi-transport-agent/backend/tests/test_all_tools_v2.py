@@ -14,23 +14,82 @@ IMPROVEMENTS in v2:
 - Better error reporting
 
 Usage:
-    python tests/test_all_tools_v2.py [--no-cleanup-after]
+    python tests/test_all_tools_v2.py [--no-cleanup-after] [--quiet]
 """
 
 import asyncio
 import httpx
-import json
+import io
 import time
 import sys
+import uuid
+from collections import Counter
 from datetime import datetime
-from typing import Dict, Any, List
+from pathlib import Path
+from typing import Dict, Any
 from test_cleanup import DatabaseCleanup
 
+try:
+    import orjson
+
+    def _dumps(obj: Any, indent: bool = False) -> bytes:
+        """Serialize to JSON bytes (orjson handles datetime natively)."""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+
+    _loads = orjson.loads
+except ImportError:
+    import json
+
+    def _dumps(obj: Any, indent: bool = False) -> bytes:
+        """Serialize to JSON bytes using the stdlib fallback."""
+        return json.dumps(
+            obj,
+            indent=2 if indent else None,
+            separators=None if indent else (",", ":"),
+            default=lambda o: o.isoformat(),
+        ).encode()
+
+    _loads = json.loads
+
 
 # Configuration
 BASE_URL = "http://localhost:8000"
 AGENT_ENDPOINT = f"{BASE_URL}/api/v1/agent/message"
 
+INTRO_BANNER = "\n".join([
+    "",
+    "=" * 80,
+    "MOVI TRANSPORT AGENT - COMPREHENSIVE TOOL TESTING SUITE v2",
+    "=" * 80,
+    "",
+    "This test suite covers:",
+    "  • All 9 tool functions",
+    "  • 20 different query variations",
+    "  • Read, Create, and Delete operations",
+    "  • Static and Dynamic asset management",
+    "  • Consequence checking and confirmation flow",
+    "  • Edge cases and error handling",
+    "",
+    "IMPROVEMENTS in v2:",
+    "  • Automatic database cleanup before tests",
+    "  • Test data setup for reliable execution",
+    "  • Optional cleanup after tests (use --no-cleanup-after to skip)",
+    "  • Better error reporting",
+    "",
+    "=" * 80,
+    "",
+    "",
+])
+
+
+def section(title: str) -> str:
+    """Build a section banner as a single string."""
+    return f"\n{'=' * 80}\n{title}\n{'=' * 80}\n"
+
+
+# Soft cap on request rate; only sleeps when the agent answers faster than this
+MAX_REQUESTS_PER_SECOND = 4
+
 
 # Test cases organized by tool category
 TEST_CASES = [
@@ -229,13 +288,27 @@ TEST_CASES = [
     },
 ]
 
+# Precompute per-case display strings once instead of slicing in the run loop
+for _case in TEST_CASES:
+    _case["query_preview"] = _case["query"][:60]
 
-class TestLogger:
-    """Logger for test results with detailed tracking."""
 
-    def __init__(self):
-        self.results: List[Dict[str, Any]] = []
-        self.start_time = time.time()
+class TestLogger:
+    """Logger for test results with detailed tracking.
+
+    Each result is appended to an NDJSON file as soon as it is logged, so a
+    run that is killed mid-way still leaves every completed test on disk.
+    Only running aggregates are kept in memory.
+    """
+
+    def __init__(self, results_file: str = "test_results_v2.ndjson"):
+        self.results_file = results_file
+        self.results_fp = open(results_file, "wb")
+        self.total = 0
+        self.passed = 0
+        self.cat_total: Counter = Counter()
+        self.cat_passed: Counter = Counter()
+        self.start_time = time.perf_counter()
 
     def log_test(self, test_case: Dict, response: Dict, duration: float, success: bool, notes: str = ""):
         """Log a single test result."""
@@ -250,87 +323,106 @@ class TestLogger:
             "requires_confirmation": test_case.get("requires_confirmation", False),
             "got_confirmation": response.get("requires_confirmation", False),
             "response_type": response.get("response_type"),
-            "duration_ms": round(duration * 1000, 2),
+            "duration_ms": int(duration * 1000),
             "error": response.get("error"),
             "test_passed": success == test_case["expected_success"],
             "notes": notes,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now()
         }
-        self.results.append(result)
+        self.results_fp.write(_dumps(result) + b"\n")
+        self.results_fp.flush()
+
+        # Running aggregates
+        category = result["category"]
+        self.total += 1
+        self.cat_total[category] += 1
+        if result["test_passed"]:
+            self.passed += 1
+            self.cat_passed[category] += 1
+
+    def iter_results(self):
+        """Stream logged results back from the NDJSON file."""
+        with open(self.results_file, "rb") as f:
+            for line in f:
+                yield _loads(line)
 
     def print_summary(self):
         """Print detailed test summary."""
-        total_time = time.time() - self.start_time
+        total_time = time.perf_counter() - self.start_time
+        self.results_fp.close()
 
-        print("\n" + "="*80)
-        print("MOVI TRANSPORT AGENT - COMPREHENSIVE TOOL TEST RESULTS v2")
-        print("="*80)
+        # Assemble the whole report and write it once
+        buf = io.StringIO()
+
+        def out(line: str = ""):
+            buf.write(line + "\n")
+
+        out("\n" + "="*80)
+        out("MOVI TRANSPORT AGENT - COMPREHENSIVE TOOL TEST RESULTS v2")
+        out("="*80)
 
         # Overall stats
-        total = len(self.results)
-        passed = sum(1 for r in self.results if r["test_passed"])
+        total = self.total
+        passed = self.passed
         failed = total - passed
 
-        print(f"\n📊 Overall Results:")
-        print(f"   Total Tests: {total}")
-        print(f"   ✅ Passed: {passed} ({passed/total*100:.1f}%)")
-        print(f"   ❌ Failed: {failed} ({failed/total*100:.1f}%)")
-        print(f"   ⏱️  Total Time: {total_time:.2f}s")
-        print(f"   📈 Avg Time/Test: {total_time/total:.2f}s")
+        out(f"\n📊 Overall Results:")
+        out(f"   Total Tests: {total}")
+        out(f"   ✅ Passed: {passed} ({passed/total*100:.1f}%)")
+        out(f"   ❌ Failed: {failed} ({failed/total*100:.1f}%)")
+        out(f"   ⏱️  Total Time: {total_time:.2f}s")
+        out(f"   📈 Avg Time/Test: {total_time/total:.2f}s")
 
         # Category breakdown
-        print(f"\n📂 Results by Category:")
+        out(f"\n📂 Results by Category:")
         categories = {}
-        for r in self.results:
-            cat = r["category"]
-            if cat not in categories:
-                categories[cat] = {"total": 0, "passed": 0}
-            categories[cat]["total"] += 1
-            if r["test_passed"]:
-                categories[cat]["passed"] += 1
-
-        for cat, stats in sorted(categories.items()):
-            pct = stats["passed"]/stats["total"]*100
+
+        for cat in sorted(self.cat_total):
+            cat_total, cat_passed = self.cat_total[cat], self.cat_passed[cat]
+            categories[cat] = {"total": cat_total, "passed": cat_passed}
+            pct = cat_passed/cat_total*100
             status = "✅" if pct == 100 else "⚠️" if pct >= 50 else "❌"
-            print(f"   {status} {cat:30s} {stats['passed']}/{stats['total']} ({pct:.0f}%)")
+            out(f"   {status} {cat:30s} {cat_passed}/{cat_total} ({pct:.0f}%)")
 
         # Detailed results
-        print(f"\n📋 Detailed Test Results:")
-        print("-"*80)
+        out(f"\n📋 Detailed Test Results:")
+        out("-"*80)
 
-        for r in self.results:
+        for r in self.iter_results():
             status = "✅ PASS" if r["test_passed"] else "❌ FAIL"
-            print(f"\n{status} | Test #{r['test_id']} - {r['category']}")
-            print(f"   Query: \"{r['query']}\"")
-            print(f"   Tool: {r['expected_tool']} → {r['actual_tool']}")
-            print(f"   Success: {r['expected_success']} → {r['actual_success']}")
+            out(f"\n{status} | Test #{r['test_id']} - {r['category']}")
+            out(f"   Query: \"{r['query']}\"")
+            out(f"   Tool: {r['expected_tool']} → {r['actual_tool']}")
+            out(f"   Success: {r['expected_success']} → {r['actual_success']}")
             if r["requires_confirmation"]:
                 conf_status = "✓" if r["got_confirmation"] else "✗"
-                print(f"   Confirmation: Required ({conf_status} Got)")
-            print(f"   Duration: {r['duration_ms']}ms")
+                out(f"   Confirmation: Required ({conf_status} Got)")
+            out(f"   Duration: {r['duration_ms']}ms")
             if r["error"]:
-                print(f"   Error: {r['error']}")
+                out(f"   Error: {r['error']}")
             if r["notes"]:
-                print(f"   Notes: {r['notes']}")
-
-        # Save to JSON
-        output_file = "test_results_v2.json"
-        with open(output_file, "w") as f:
-            json.dump({
-                "summary": {
-                    "total": total,
-                    "passed": passed,
-                    "failed": failed,
-                    "pass_rate": f"{passed/total*100:.1f}%",
-                    "total_time": f"{total_time:.2f}s",
-                    "avg_time": f"{total_time/total:.2f}s"
-                },
-                "categories": categories,
-                "results": self.results
-            }, f, indent=2)
-
-        print(f"\n💾 Detailed results saved to: {output_file}")
-        print("="*80 + "\n")
+                out(f"   Notes: {r['notes']}")
+
+        # Save aggregates to JSON (per-test results are already in the NDJSON file)
+        output_file = "test_results_v2_summary.json"
+        Path(output_file).write_bytes(_dumps({
+            "summary": {
+                "total": total,
+                "passed": passed,
+                "failed": failed,
+                "pass_rate": f"{passed/total*100:.1f}%",
+                "total_time": f"{total_time:.2f}s",
+                "avg_time": f"{total_time/total:.2f}s"
+            },
+            "categories": categories,
+            "results_file": self.results_file
+        }, indent=True))
+
+        out(f"\n💾 Detailed results saved to: {self.results_file}")
+        out(f"💾 Summary saved to: {output_file}")
+        out("="*80 + "\n")
+
+        sys.stdout.write(buf.getvalue())
 
 
 async def test_agent_query(query: str, session_id: str) -> Dict[str, Any]:
@@ -347,34 +439,41 @@ async def test_agent_query(query: str, session_id: str) -> Dict[str, Any]:
         return response.json()
 
 
-async def run_tests(cleanup_after: bool = True):
+async def run_tests(cleanup_after: bool = True, quiet: bool = False):
     """Run all test cases and generate report."""
     # Setup database before tests
-    print("\n" + "="*80)
-    print("PREPARING DATABASE FOR TESTING")
-    print("="*80)
+    if not quiet:
+        sys.stdout.write(section("PREPARING DATABASE FOR TESTING"))
 
     cleanup = DatabaseCleanup()
     cleanup.before_tests()
 
     logger = TestLogger()
 
-    print("\n" + "="*80)
-    print("RUNNING COMPREHENSIVE TOOL TESTS")
-    print("="*80)
+    if not quiet:
+        sys.stdout.write(section("RUNNING COMPREHENSIVE TOOL TESTS"))
     print(f"\n🚀 Starting tests...")
     print(f"   Testing {len(TEST_CASES)} queries across all 9 tools")
     print(f"   Endpoint: {AGENT_ENDPOINT}\n")
 
+    min_interval = 1 / MAX_REQUESTS_PER_SECOND
+    next_slot = 0.0
+
     for i, test_case in enumerate(TEST_CASES, 1):
-        print(f"[{i}/{len(TEST_CASES)}] Testing: {test_case['query'][:60]}...")
+        # Pace requests without idling when the agent is already slower than the cap
+        wait = next_slot - time.perf_counter()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        next_slot = time.perf_counter() + min_interval
 
-        session_id = f"test-{test_case['id']}-{int(time.time())}"
+        print(f"[{i}/{len(TEST_CASES)}] Testing: {test_case['query_preview']}...")
+
+        session_id = f"test-{test_case['id']}-{uuid.uuid4().hex[:12]}"
 
         try:
-            start = time.time()
+            start = time.perf_counter()
             response = await test_agent_query(test_case["query"], session_id)
-            duration = time.time() - start
+            duration = time.perf_counter() - start
 
             # Determine success
             if test_case.get("requires_confirmation"):
@@ -399,42 +498,28 @@ async def run_tests(cleanup_after: bool = True):
             logger.log_test(test_case, {"error": error_msg}, 0, False, f"Exception: {error_msg}")
             print(f"   ❌ Error: {error_msg}")
 
-        # Small delay between tests
-        await asyncio.sleep(0.5)
-
     # Print summary
     logger.print_summary()
 
     # Cleanup after tests (optional)
     if cleanup_after:
-        print("\n" + "="*80)
-        print("CLEANING UP AFTER TESTS")
-        print("="*80)
+        if not quiet:
+            sys.stdout.write(section("CLEANING UP AFTER TESTS"))
         cleanup.after_tests()
     else:
         print("\n⚠️  Skipping cleanup - test data remains in database")
 
+    cleanup.close()
+
 
 if __name__ == "__main__":
-    print("\n" + "="*80)
-    print("MOVI TRANSPORT AGENT - COMPREHENSIVE TOOL TESTING SUITE v2")
-    print("="*80)
-    print("\nThis test suite covers:")
-    print("  • All 9 tool functions")
-    print("  • 20 different query variations")
-    print("  • Read, Create, and Delete operations")
-    print("  • Static and Dynamic asset management")
-    print("  • Consequence checking and confirmation flow")
-    print("  • Edge cases and error handling")
-    print("\nIMPROVEMENTS in v2:")
-    print("  • Automatic database cleanup before tests")
-    print("  • Test data setup for reliable execution")
-    print("  • Optional cleanup after tests (use --no-cleanup-after to skip)")
-    print("  • Better error reporting")
-    print("\n" + "="*80 + "\n")
-
-    # Check for --no-cleanup-after flag
+    # Check for flags
     cleanup_after = "--no-cleanup-after" not in sys.argv
+    quiet = "--quiet" in sys.argv
+
+    if not quiet:
+        sys.stdout.write(INTRO_BANNER)
 
     # Run tests
-    asyncio.run(run_tests(cleanup_after=cleanup_after))
+    asyncio.run(run_tests(cleanup_after=cleanup_after, quiet=quiet))
+    sys.stdout.flush()
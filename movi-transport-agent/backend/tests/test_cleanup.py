@@ -19,54 +19,57 @@ PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 DB_PATH = PROJECT_ROOT / "database" / "transport.db"
 
 
+# Entities created by the test suites
+TEST_STOPS = ('Odeon Circle', 'MG Road Metro')
+TEST_PATHS = ('Tech-Loop', 'Metro-Route')
+
+
 class DatabaseCleanup:
-    """Handles database cleanup for test isolation."""
+    """Handles database cleanup for test isolation.
+
+    All statements run on one shared connection. The clean_* helpers do not
+    commit on their own; callers wrap them in ``with self.conn:`` so a whole
+    cleanup pass is a single transaction (and a single fsync).
+    """
 
     def __init__(self, db_path: str = str(DB_PATH)):
         self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
 
-    def clean_test_stops(self):
-        """Remove test-created stops."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        # Keep the cleanup/setup read path in memory
+        self.conn.execute("PRAGMA mmap_size=268435456")  # 256 MB memory-mapped I/O
+        self.conn.execute("PRAGMA cache_size=-65536")    # 64 MB page cache (negative = KiB)
+        self.conn.execute("PRAGMA temp_store=MEMORY")
 
-        test_stops = ['Odeon Circle', 'MG Road Metro']
+    def close(self):
+        """Close the shared connection."""
+        self.conn.close()
 
-        for stop_name in test_stops:
-            cursor.execute("DELETE FROM stops WHERE name = ?", (stop_name,))
+    def clean_test_stops(self):
+        """Remove test-created stops."""
+        cursor = self.conn.execute(
+            "DELETE FROM stops WHERE name IN (?, ?)", TEST_STOPS
+        )
 
         deleted = cursor.rowcount
-        conn.commit()
-        conn.close()
-
         print(f"✓ Cleaned {deleted} test stops")
         return deleted
 
     def clean_test_paths(self):
         """Remove test-created paths."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        test_paths = ['Tech-Loop', 'Metro-Route']
-
-        for path_name in test_paths:
-            cursor.execute("DELETE FROM paths WHERE path_name = ?", (path_name,))
+        cursor = self.conn.execute(
+            "DELETE FROM paths WHERE path_name IN (?, ?)", TEST_PATHS
+        )
 
         deleted = cursor.rowcount
-        conn.commit()
-        conn.close()
-
         print(f"✓ Cleaned {deleted} test paths")
         return deleted
 
     def clean_test_routes(self):
         """Remove test-created routes."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
         # Routes created by tests (Path-1 at 08:30, Path-2 at 18:45)
         # These have specific patterns we can identify
-        cursor.execute("""
+        cursor = self.conn.execute("""
             DELETE FROM routes
             WHERE route_id IN (
                 SELECT route_id FROM routes
@@ -77,34 +80,31 @@ class DatabaseCleanup:
         """)
 
         deleted = cursor.rowcount
-        conn.commit()
-        conn.close()
-
         print(f"✓ Cleaned {deleted} test routes")
         return deleted
 
     def clean_test_deployments(self):
         """Remove test-created vehicle deployments."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
         # Clean deployments created in last hour (test artifacts)
-        cursor.execute("""
+        cursor = self.conn.execute("""
             DELETE FROM deployments
             WHERE deployed_at > datetime('now', '-1 hour')
         """)
 
         deleted = cursor.rowcount
-        conn.commit()
-        conn.close()
-
         print(f"✓ Cleaned {deleted} test deployments")
         return deleted
 
+    def clean_all(self):
+        """Remove every kind of test artifact (caller manages the transaction)."""
+        self.clean_test_stops()
+        self.clean_test_paths()
+        self.clean_test_routes()
+        self.clean_test_deployments()
+
     def setup_test_data(self):
         """Setup required test data (e.g., assign vehicle to trip 6 for test #17)."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self.conn.cursor()
 
         # Check if trip 6 exists
         cursor.execute("SELECT trip_id FROM daily_trips WHERE trip_id = 6")
@@ -148,7 +148,6 @@ class DatabaseCleanup:
                             INSERT INTO deployments (trip_id, vehicle_id, driver_id)
                             VALUES (6, ?, ?)
                         """, (test_vehicle[0], test_driver[0]))
-                        conn.commit()
                         print(f"✓ Assigned vehicle {test_vehicle[0]} ({test_vehicle[1]}) and driver {test_driver[0]} ({test_driver[1]}) to trip 6")
                     else:
                         print(f"⚠ Vehicle {test_vehicle[0]} already assigned, skipping")
@@ -160,8 +159,6 @@ class DatabaseCleanup:
         else:
             print("⚠ Trip 6 not found")
 
-        conn.close()
-
     def full_reset(self):
         """Full database reset - use with caution."""
         print("\n⚠️  FULL DATABASE RESET ⚠️")
@@ -172,49 +169,57 @@ class DatabaseCleanup:
             print("Cancelled.")
             return
 
-        self.clean_test_stops()
-        self.clean_test_paths()
-        self.clean_test_routes()
-        self.clean_test_deployments()
+        with self.conn:
+            self.clean_all()
         print("\n✅ Database reset complete")
 
     def before_tests(self):
         """Run before test suite."""
-        print("\n🧹 Cleaning database before tests...")
-        self.clean_test_stops()
-        self.clean_test_paths()
-        self.clean_test_routes()
-        self.clean_test_deployments()
+        # Cleanup and setup commit together as one transaction
+        with self.conn:
+            print("\n🧹 Cleaning database before tests...")
+            self.clean_all()
 
-        print("\n🔧 Setting up test data...")
-        self.setup_test_data()
+            print("\n🔧 Setting up test data...")
+            self.setup_test_data()
 
         print("\n✅ Database ready for testing")
 
     def after_tests(self):
         """Run after test suite."""
         print("\n🧹 Cleaning database after tests...")
-        self.clean_test_stops()
-        self.clean_test_paths()
-        self.clean_test_routes()
-        self.clean_test_deployments()
+        with self.conn:
+            self.clean_all()
         print("\n✅ Cleanup complete")
 
 
+USAGE = "\n".join([
+    "Usage: python test_cleanup.py [before|after|full|setup]",
+    "  before - Clean and setup before tests",
+    "  after  - Clean up after tests",
+    "  full   - Full database reset (interactive)",
+    "  setup  - Just setup test data (e.g., assign vehicle to trip 6)",
+    "",
+])
+
+
 def main():
     """CLI entry point."""
-    cleanup = DatabaseCleanup()
-
     if len(sys.argv) < 2:
-        print("Usage: python test_cleanup.py [before|after|full|setup]")
-        print("  before - Clean and setup before tests")
-        print("  after  - Clean up after tests")
-        print("  full   - Full database reset (interactive)")
-        print("  setup  - Just setup test data (e.g., assign vehicle to trip 6)")
+        sys.stdout.write(USAGE)
         sys.exit(1)
 
     mode = sys.argv[1]
+    cleanup = DatabaseCleanup()
+
+    try:
+        run_mode(cleanup, mode)
+    finally:
+        cleanup.close()
+
 
+def run_mode(cleanup: DatabaseCleanup, mode: str):
+    """Dispatch a single CLI mode."""
     if mode == "before":
         cleanup.before_tests()
     elif mode == "after":
@@ -223,7 +228,8 @@ def main():
         cleanup.full_reset()
     elif mode == "setup":
         print("\n🔧 Setting up test data...")
-        cleanup.setup_test_data()
+        with cleanup.conn:
+            cleanup.setup_test_data()
         print("\n✅ Test data setup complete")
     else:
         print(f"Unknown mode: {mode}")
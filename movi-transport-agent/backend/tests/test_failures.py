@@ -6,110 +6,153 @@ This script runs only the tests that were failing in the previous run.
 
 import asyncio
 import httpx
-import json
+import io
+import sys
 import time
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> bytes:
+        """Serialize to indented JSON bytes."""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    import json
+
+    def _dumps(obj: Any) -> bytes:
+        """Serialize to indented JSON bytes using the stdlib fallback."""
+        return json.dumps(obj, indent=2).encode()
 
 # Configuration
 BASE_URL = "http://localhost:8000"
 AGENT_ENDPOINT = f"{BASE_URL}/api/v1/agent/message"
+MAX_CONCURRENT_TESTS = 4
+
+@dataclass(frozen=True, slots=True)
+class TestCase:
+    """A single agent query to re-run and its expected outcome."""
+    id: int
+    category: str
+    query: str
+    expected_tool: str
+    expected_success: bool
+    description: str
+    requires_confirmation: bool = False
+
 
 # Previously failed tests
-FAILED_TESTS = [
-    {
-        "id": 5,
-        "category": "READ - Static",
-        "query": "List all stops for 'Path-2'",
-        "expected_tool": "list_stops_for_path",
-        "expected_success": True,
-        "description": "Get ordered stops for a path"
-    },
-    {
-        "id": 6,
-        "category": "READ - Static",
-        "query": "What stops are in Path-1?",
-        "expected_tool": "list_stops_for_path",
-        "expected_success": True,
-        "description": "Alternative phrasing for path stops"
-    },
-    {
-        "id": 7,
-        "category": "READ - Static",
-        "query": "Show me all routes that use 'Path-1'",
-        "expected_tool": "list_routes_by_path",
-        "expected_success": True,
-        "description": "List routes using a specific path"
-    },
-    {
-        "id": 8,
-        "category": "READ - Static",
-        "query": "Which routes go through Path-2?",
-        "expected_tool": "list_routes_by_path",
-        "expected_success": True,
-        "description": "Alternative phrasing for routes by path"
-    }
-]
+FAILED_TESTS = (
+    TestCase(
+        id=5,
+        category="READ - Static",
+        query="List all stops for 'Path-2'",
+        expected_tool="list_stops_for_path",
+        expected_success=True,
+        description="Get ordered stops for a path"
+    ),
+    TestCase(
+        id=6,
+        category="READ - Static",
+        query="What stops are in Path-1?",
+        expected_tool="list_stops_for_path",
+        expected_success=True,
+        description="Alternative phrasing for path stops"
+    ),
+    TestCase(
+        id=7,
+        category="READ - Static",
+        query="Show me all routes that use 'Path-1'",
+        expected_tool="list_routes_by_path",
+        expected_success=True,
+        description="List routes using a specific path"
+    ),
+    TestCase(
+        id=8,
+        category="READ - Static",
+        query="Which routes go through Path-2?",
+        expected_tool="list_routes_by_path",
+        expected_success=True,
+        description="Alternative phrasing for routes by path"
+    )
+)
 
 class TestLogger:
     def __init__(self):
         self.results: List[Dict[str, Any]] = []
-        self.start_time = time.time()
-
-    def log_test(self, test_case: Dict, response: Dict, duration: float, success: bool, notes: str = ""):
+        # Running tallies so print_summary doesn't rescan the results
+        self.passed = 0
+        self.failed = 0
+        self.start_time = time.perf_counter()
+
+    def log_test(self, test_case: TestCase, response: Dict, duration: float, success: bool, notes: str = "", ts: Optional[str] = None):
+        get = response.get
+        expected_success = test_case.expected_success
         result = {
-            "test_id": test_case["id"],
-            "category": test_case["category"],
-            "query": test_case["query"],
-            "expected_tool": test_case["expected_tool"],
-            "actual_tool": response.get("tool_name"),
-            "expected_success": test_case["expected_success"],
+            "test_id": test_case.id,
+            "category": test_case.category,
+            "query": test_case.query,
+            "expected_tool": test_case.expected_tool,
+            "actual_tool": get("tool_name"),
+            "expected_success": expected_success,
             "actual_success": success,
-            "requires_confirmation": test_case.get("requires_confirmation", False),
-            "got_confirmation": response.get("requires_confirmation", False),
-            "response_type": response.get("response_type"),
+            "requires_confirmation": test_case.requires_confirmation,
+            "got_confirmation": get("requires_confirmation", False),
+            "response_type": get("response_type"),
             "duration_ms": round(duration * 1000, 2),
-            "error": response.get("error"),
-            "test_passed": success == test_case["expected_success"],
+            "error": get("error"),
+            "test_passed": success == expected_success,
             "notes": notes,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": ts or datetime.now().isoformat()
         }
         self.results.append(result)
+        if result["test_passed"]:
+            self.passed += 1
+        else:
+            self.failed += 1
 
     def print_summary(self):
-        total_time = time.time() - self.start_time
-        total = len(self.results)
-        passed = sum(1 for r in self.results if r["test_passed"])
-        failed = total - passed
-
-        print("\n" + "="*80)
-        print("FAILED TESTS RE-RUN RESULTS")
-        print("="*80)
-        print(f"\n📊 Results:")
-        print(f"   Total Tests: {total}")
-        print(f"   ✅ Passed: {passed} ({passed/total*100:.1f}%)")
-        print(f"   ❌ Failed: {failed} ({failed/total*100:.1f}%)")
-        print(f"   ⏱️  Total Time: {total_time:.2f}s")
-
-        print(f"\n📋 Test Results:")
-        print("-"*80)
+        total_time = time.perf_counter() - self.start_time
+        passed = self.passed
+        failed = self.failed
+        total = passed + failed
+
+        # Build the report in memory and emit it with one write
+        buf = io.StringIO()
+
+        def out(line: str = ""):
+            buf.write(line + "\n")
+
+        out("\n" + "="*80)
+        out("FAILED TESTS RE-RUN RESULTS")
+        out("="*80)
+        out(f"\n📊 Results:")
+        out(f"   Total Tests: {total}")
+        out(f"   ✅ Passed: {passed} ({passed/total*100:.1f}%)")
+        out(f"   ❌ Failed: {failed} ({failed/total*100:.1f}%)")
+        out(f"   ⏱️  Total Time: {total_time:.2f}s")
+
+        out(f"\n📋 Test Results:")
+        out("-"*80)
 
         for r in self.results:
             status = "✅ PASS" if r["test_passed"] else "❌ FAIL"
-            print(f"\n{status} | Test #{r['test_id']} - {r['category']}")
-            print(f"   Query: \"{r['query']}\"")
-            print(f"   Tool: {r['expected_tool']} → {r['actual_tool']}")
-            print(f"   Success: {r['expected_success']} → {r['actual_success']}")
-            print(f"   Duration: {r['duration_ms']}ms")
+            out(f"\n{status} | Test #{r['test_id']} - {r['category']}")
+            out(f"   Query: \"{r['query']}\"")
+            out(f"   Tool: {r['expected_tool']} → {r['actual_tool']}")
+            out(f"   Success: {r['expected_success']} → {r['actual_success']}")
+            out(f"   Duration: {r['duration_ms']}ms")
             if r["error"]:
-                print(f"   Error: {r['error']}")
+                out(f"   Error: {r['error']}")
             if r["notes"]:
-                print(f"   Notes: {r['notes']}")
+                out(f"   Notes: {r['notes']}")
 
         # Save to JSON
         output_file = "test_failures_results.json"
-        with open(output_file, "w") as f:
-            json.dump({
+        with open(output_file, "wb") as f:
+            f.write(_dumps({
                 "summary": {
                     "total": total,
                     "passed": passed,
@@ -118,22 +161,43 @@ class TestLogger:
                     "total_time": f"{total_time:.2f}s"
                 },
                 "results": self.results
-            }, f, indent=2)
+            }))
 
-        print(f"\n💾 Results saved to: {output_file}")
-        print("="*80 + "\n")
+        out(f"\n💾 Results saved to: {output_file}")
+        out("="*80 + "\n")
 
-async def test_agent_query(query: str, session_id: str) -> Dict[str, Any]:
-    async with httpx.AsyncClient(timeout=90.0) as client:
-        response = await client.post(
-            AGENT_ENDPOINT,
-            json={
-                "user_input": query,
-                "session_id": session_id,
-                "context": {"page": "busDashboard"}
-            }
+        sys.stdout.write(buf.getvalue())
+        sys.stdout.flush()
+
+# Shared client so every test reuses pooled keep-alive connections
+_CLIENT: Optional[httpx.AsyncClient] = None
+
+async def get_client() -> httpx.AsyncClient:
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = httpx.AsyncClient(
+            timeout=90.0,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
         )
-        return response.json()
+    return _CLIENT
+
+async def close_client():
+    global _CLIENT
+    if _CLIENT is not None:
+        await _CLIENT.aclose()
+        _CLIENT = None
+
+async def test_agent_query(query: str, session_id: str) -> Dict[str, Any]:
+    client = await get_client()
+    response = await client.post(
+        AGENT_ENDPOINT,
+        json={
+            "user_input": query,
+            "session_id": session_id,
+            "context": {"page": "busDashboard"}
+        }
+    )
+    return response.json()
 
 async def run_failed_tests():
     print("\n" + "="*80)
@@ -143,27 +207,37 @@ async def run_failed_tests():
 
     logger = TestLogger()
 
-    for i, test_case in enumerate(FAILED_TESTS, 1):
-        print(f"[{i}/{len(FAILED_TESTS)}] Testing: {test_case['query']}")
+    # Tests are independent network calls: run them concurrently, capped by the semaphore
+    sem = asyncio.Semaphore(MAX_CONCURRENT_TESTS)
+
+    async def run_one(i: int, test_case: TestCase):
+        async with sem:
+            print(f"[{i}/{len(FAILED_TESTS)}] Testing: {test_case.query}")
+
+            session_id = f"test-failed-{test_case.id}-{int(time.time())}"
 
-        session_id = f"test-failed-{test_case['id']}-{int(time.time())}"
+            try:
+                start = time.perf_counter()
+                response = await test_agent_query(test_case.query, session_id)
+                duration = time.perf_counter() - start
 
-        try:
-            start = time.time()
-            response = await test_agent_query(test_case["query"], session_id)
-            duration = time.time() - start
+                success = response.get("execution_success", False)
+                notes = ""
 
-            success = response.get("execution_success", False)
-            notes = ""
+                logger.log_test(test_case, response, duration, success, notes)
 
-            logger.log_test(test_case, response, duration, success, notes)
+            except Exception as e:
+                error_msg = f"{type(e).__name__}: {str(e)}" if str(e) else type(e).__name__
+                logger.log_test(test_case, {"error": error_msg}, 0, False, f"Exception: {error_msg}")
+                print(f"   ❌ Error: {error_msg}")
 
-        except Exception as e:
-            error_msg = f"{type(e).__name__}: {str(e)}" if str(e) else type(e).__name__
-            logger.log_test(test_case, {"error": error_msg}, 0, False, f"Exception: {error_msg}")
-            print(f"   ❌ Error: {error_msg}")
+    try:
+        await asyncio.gather(*(run_one(i, tc) for i, tc in enumerate(FAILED_TESTS, 1)))
+    finally:
+        await close_client()
 
-        await asyncio.sleep(0.5)
+    # Results arrive in completion order; report them in test order
+    logger.results.sort(key=lambda r: r["test_id"])
 
     logger.print_summary()
 
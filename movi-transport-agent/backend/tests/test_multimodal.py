@@ -3,84 +3,69 @@ Test script for multimodal input processing.
 Demonstrates text, image, audio, and video processing using Gemini 2.5.
 """
 import asyncio
-import sys
-import os
 from pathlib import Path
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
-env_path = Path(__file__).parent / '.env'
-load_dotenv(dotenv_path=env_path)
 
-# Add the app directory to the path
-sys.path.insert(0, str(Path(__file__).parent))
+# app.multimodal pulls in httpx/pydantic/settings, so it is imported inside
+# the functions that need it; the inputs below are MultimodalInput kwargs.
+# They are independent, so main() sends them as one concurrent batch and
+# hands each test its result.
+TEXT_ONLY_INPUT = dict(
+    text="How many vehicles are not assigned?",
+    current_page="busDashboard"
+)
+
+# Using a sample image (you can replace with your own). main() downloads it once
+# into tests/fixtures/ and passes the local copy as image_file.
+SAMPLE_IMAGE_URL = "https://upload.wikimedia.org/wikipedia/commons/thumb/d/dd/Gfp-wisconsin-madison-the-nature-boardwalk.jpg/2560px-Gfp-wisconsin-madison-the-nature-boardwalk.jpg"
 
-from app.multimodal import (
-    GeminiMultimodalProcessor,
-    MultimodalInput,
-    transcribe_audio,
-    analyze_screenshot,
-    analyze_video
+IMAGE_URL_INPUT = dict(
+    text="What's in this image? Are there any UI elements visible?",
+    current_page="busDashboard"
 )
 
+MIXED_INPUT = dict(
+    text="List all trips visible in this screenshot",
+    current_page="busDashboard"
+)
 
-async def test_text_only():
+STRUCTURED_OUTPUT_INPUT = dict(
+    text="Remove vehicle MH-12-3456 from Bulk - 00:01 trip",
+    current_page="busDashboard"
+)
+
+
+def test_text_only(result):
     """Test text-only input processing."""
     print("\n" + "="*60)
     print("TEST 1: Text-Only Input")
     print("="*60)
 
-    processor = GeminiMultimodalProcessor()
-
-    try:
-        multimodal_input = MultimodalInput(
-            text="How many vehicles are not assigned?",
-            current_page="busDashboard"
-        )
-
-        result = await processor.process_multimodal_input(multimodal_input)
-
-        print(f"Modality: {result['modality']}")
-        print(f"Comprehension: {result['comprehension']}")
-        print(f"Action Intent: {result['extracted_entities']['action_intent']}")
-        print(f"Entities: {result['extracted_entities']}")
-
-    finally:
-        await processor.close()
+    print(f"Modality: {result['modality']}")
+    print(f"Comprehension: {result['comprehension']}")
+    print(f"Action Intent: {result['extracted_entities']['action_intent']}")
+    print(f"Entities: {result['extracted_entities']}")
 
 
-async def test_image_url():
+def test_image_url(result):
     """Test image processing with URL."""
     print("\n" + "="*60)
     print("TEST 2: Image URL Processing")
     print("="*60)
 
-    processor = GeminiMultimodalProcessor()
-
-    try:
-        # Using a sample image URL (you can replace with your own)
-        multimodal_input = MultimodalInput(
-            text="What's in this image? Are there any UI elements visible?",
-            image_file="https://upload.wikimedia.org/wikipedia/commons/thumb/d/dd/Gfp-wisconsin-madison-the-nature-boardwalk.jpg/2560px-Gfp-wisconsin-madison-the-nature-boardwalk.jpg",
-            current_page="busDashboard"
-        )
-
-        result = await processor.process_multimodal_input(multimodal_input)
-
-        print(f"Modality: {result['modality']}")
-        print(f"Comprehension: {result['comprehension']}")
-        print(f"Entities: {result['extracted_entities']}")
-
-    finally:
-        await processor.close()
+    print(f"Modality: {result['modality']}")
+    print(f"Comprehension: {result['comprehension']}")
+    print(f"Entities: {result['extracted_entities']}")
 
 
-async def test_screenshot_analysis():
+async def test_screenshot_analysis(processor):
     """Test analyzing a transport dashboard screenshot."""
     print("\n" + "="*60)
     print("TEST 3: Screenshot Analysis (if screenshot file exists)")
     print("="*60)
 
+    from app.multimodal import analyze_screenshot
+
     # Example: If you have a screenshot file
     screenshot_path = Path("demo/screenshots/dashboard.png")
 
@@ -92,7 +77,8 @@ async def test_screenshot_analysis():
     result = await analyze_screenshot(
         image_file=screenshot_path,
         user_query="Remove the vehicle from this trip",
-        current_page="busDashboard"
+        current_page="busDashboard",
+        processor=processor
     )
 
     print(f"Modality: {result['modality']}")
@@ -102,68 +88,41 @@ async def test_screenshot_analysis():
     print(f"Vehicle IDs: {result['extracted_entities'].get('vehicle_ids', [])}")
 
 
-async def test_mixed_input():
+def test_mixed_input(result):
     """Test mixed text + image input."""
     print("\n" + "="*60)
     print("TEST 4: Mixed Input (Text + Image)")
     print("="*60)
 
-    processor = GeminiMultimodalProcessor()
-
-    try:
-        multimodal_input = MultimodalInput(
-            text="List all trips visible in this screenshot",
-            image_file="https://upload.wikimedia.org/wikipedia/commons/thumb/d/dd/Gfp-wisconsin-madison-the-nature-boardwalk.jpg/2560px-Gfp-wisconsin-madison-the-nature-boardwalk.jpg",
-            current_page="busDashboard"
-        )
-
-        result = await processor.process_multimodal_input(multimodal_input)
-
-        print(f"Modality: {result['modality']}")
-        print(f"Comprehension: {result['comprehension']}")
-        print(f"Confidence: {result.get('confidence', 'N/A')}")
-
-    finally:
-        await processor.close()
+    print(f"Modality: {result['modality']}")
+    print(f"Comprehension: {result['comprehension']}")
+    print(f"Confidence: {result.get('confidence', 'N/A')}")
 
 
-async def test_comprehension_output():
+def test_comprehension_output(result):
     """Test the structured output format."""
     print("\n" + "="*60)
     print("TEST 5: Structured Output Validation")
     print("="*60)
 
-    processor = GeminiMultimodalProcessor()
+    # Validate output structure
+    required_keys = ["original_text", "modality", "comprehension", "extracted_entities"]
+    for key in required_keys:
+        assert key in result, f"Missing required key: {key}"
 
-    try:
-        multimodal_input = MultimodalInput(
-            text="Remove vehicle MH-12-3456 from Bulk - 00:01 trip",
-            current_page="busDashboard"
-        )
-
-        result = await processor.process_multimodal_input(multimodal_input)
-
-        # Validate output structure
-        required_keys = ["original_text", "modality", "comprehension", "extracted_entities"]
-        for key in required_keys:
-            assert key in result, f"Missing required key: {key}"
-
-        # Validate extracted_entities structure
-        entity_keys = ["trip_ids", "vehicle_ids", "action_intent"]
-        for key in entity_keys:
-            assert key in result["extracted_entities"], f"Missing entity key: {key}"
-
-        print("✓ Output structure validation passed")
-        print(f"\nOutput:")
-        print(f"  Original Text: {result['original_text']}")
-        print(f"  Modality: {result['modality']}")
-        print(f"  Comprehension: {result['comprehension']}")
-        print(f"  Action Intent: {result['extracted_entities']['action_intent']}")
-        print(f"  Trip IDs: {result['extracted_entities']['trip_ids']}")
-        print(f"  Vehicle IDs: {result['extracted_entities']['vehicle_ids']}")
+    # Validate extracted_entities structure
+    entity_keys = ["trip_ids", "vehicle_ids", "action_intent"]
+    for key in entity_keys:
+        assert key in result["extracted_entities"], f"Missing entity key: {key}"
 
-    finally:
-        await processor.close()
+    print("✓ Output structure validation passed")
+    print(f"\nOutput:")
+    print(f"  Original Text: {result['original_text']}")
+    print(f"  Modality: {result['modality']}")
+    print(f"  Comprehension: {result['comprehension']}")
+    print(f"  Action Intent: {result['extracted_entities']['action_intent']}")
+    print(f"  Trip IDs: {result['extracted_entities']['trip_ids']}")
+    print(f"  Vehicle IDs: {result['extracted_entities']['vehicle_ids']}")
 
 
 async def main():
@@ -173,21 +132,35 @@ async def main():
     print("Testing TICKET #4 Implementation")
     print("="*60)
 
+    from app.multimodal import GeminiMultimodalProcessor, MultimodalInput
+    from fixture_cache import cached_fixture
+
+    processor = GeminiMultimodalProcessor()
+
     try:
+        # Tests 1, 2, 4 and 5 are independent OpenRouter calls: send them as one batch
+        sample_image = cached_fixture(SAMPLE_IMAGE_URL)
+        text_result, image_result, mixed_result, structured_result = await processor.process_batch([
+            MultimodalInput(**TEXT_ONLY_INPUT),
+            MultimodalInput(**IMAGE_URL_INPUT, image_file=sample_image),
+            MultimodalInput(**MIXED_INPUT, image_file=sample_image),
+            MultimodalInput(**STRUCTURED_OUTPUT_INPUT),
+        ])
+
         # Test 1: Text only
-        await test_text_only()
+        test_text_only(text_result)
 
         # Test 2: Image URL
-        await test_image_url()
+        test_image_url(image_result)
 
         # Test 3: Screenshot analysis (if file exists)
-        await test_screenshot_analysis()
+        await test_screenshot_analysis(processor)
 
         # Test 4: Mixed input
-        await test_mixed_input()
+        test_mixed_input(mixed_result)
 
         # Test 5: Output structure validation
-        await test_comprehension_output()
+        test_comprehension_output(structured_result)
 
         print("\n" + "="*60)
         print("ALL TESTS COMPLETED")
@@ -198,7 +171,14 @@ async def main():
         import traceback
         traceback.print_exc()
 
+    finally:
+        await processor.close()
+
 
 if __name__ == "__main__":
+    # Load environment variables from .env file (under pytest, conftest.py does this once)
+    from dotenv import load_dotenv
+    load_dotenv(dotenv_path=Path(__file__).parent / '.env')
+
     # Run the async main function
     asyncio.run(main())
@@ -7,13 +7,16 @@ This tests:
 3. Structured output parsing
 """
 import asyncio
-import sys
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-# Add backend to path for imports
-sys.path.insert(0, str(Path(__file__).parent))
+# app.* pulls in httpx/pydantic/settings; import it inside the tests so merely
+# collecting this module (or deselecting it with -k) stays cheap
+if TYPE_CHECKING:
+    from app.multimodal.gemini_wrapper import GeminiMultimodalProcessor
 
-from app.multimodal.gemini_wrapper import GeminiMultimodalProcessor, MultimodalInput
+# Reuse LLM responses across test runs (same prompts every run)
+LLM_CACHE_PATH = Path(__file__).resolve().parent.parent / "data" / "llm_cache.json"
 
 
 def print_section(title: str):
@@ -23,11 +26,11 @@ def print_section(title: str):
     print("=" * 80)
 
 
-async def test_text_only_with_ai():
+async def test_text_only_with_ai(processor: "GeminiMultimodalProcessor"):
     """Test text-only input processing with AI (calls OpenRouter)."""
-    print_section("Test 1: Text-Only Input (Calls Gemini 2.5 Pro via OpenRouter)")
+    from app.multimodal.gemini_wrapper import MultimodalInput
 
-    processor = GeminiMultimodalProcessor()
+    print_section("Test 1: Text-Only Input (Calls Gemini 2.5 Pro via OpenRouter)")
 
     test_input = MultimodalInput(
         text="Remove vehicle MH-12-3456 from trip Bulk - 00:01",
@@ -52,11 +55,11 @@ async def test_text_only_with_ai():
             print(f"    - {key}: {value}")
 
 
-async def test_transport_specific_intent():
+async def test_transport_specific_intent(processor: "GeminiMultimodalProcessor"):
     """Test transport-specific intent extraction with AI."""
-    print_section("Test 2: Transport Intent Extraction (Tests Transport-Specific Prompts)")
+    from app.multimodal.gemini_wrapper import MultimodalInput
 
-    processor = GeminiMultimodalProcessor()
+    print_section("Test 2: Transport Intent Extraction (Tests Transport-Specific Prompts)")
 
     test_cases = [
         "Show me all unassigned vehicles",
@@ -65,16 +68,16 @@ async def test_transport_specific_intent():
         "Assign vehicle KA-01-AB-1234 to trip ADX - 05:10"
     ]
 
-    for idx, test_text in enumerate(test_cases, 1):
-        print(f"\n{idx}. Testing: '{test_text}'")
-        print("   🌐 Calling OpenRouter API...")
+    print(f"\n🌐 Calling OpenRouter API for {len(test_cases)} inputs concurrently...")
 
-        test_input = MultimodalInput(
-            text=test_text,
-            current_page="busDashboard"
-        )
+    # The four extractions are independent, so send them as one batch
+    results = await processor.process_batch([
+        MultimodalInput(text=test_text, current_page="busDashboard")
+        for test_text in test_cases
+    ])
 
-        result = await processor.process_multimodal_input(test_input)
+    for idx, (test_text, result) in enumerate(zip(test_cases, results), 1):
+        print(f"\n{idx}. Testing: '{test_text}'")
 
         entities = result.get('extracted_entities', {})
         action_intent = entities.get('action_intent', 'unknown')
@@ -84,16 +87,17 @@ async def test_transport_specific_intent():
         print(f"      Comprehension: {result.get('comprehension', 'N/A')[:80]}...")
 
 
-async def test_multimodal_with_image():
+async def test_multimodal_with_image(processor: "GeminiMultimodalProcessor"):
     """Test multimodal input with image URL (calls OpenRouter)."""
-    print_section("Test 3: Multimodal Input with Image (Tests Vision Capabilities)")
+    from app.multimodal.gemini_wrapper import MultimodalInput
+    from fixture_cache import cached_fixture
 
-    processor = GeminiMultimodalProcessor()
+    print_section("Test 3: Multimodal Input with Image (Tests Vision Capabilities)")
 
-    # Use a simple public image URL
+    # Use a simple public image, downloaded once into tests/fixtures/
     test_input = MultimodalInput(
         text="What do you see in this image?",
-        image_file="https://upload.wikimedia.org/wikipedia/commons/thumb/3/3a/Cat03.jpg/481px-Cat03.jpg",
+        image_file=cached_fixture("https://upload.wikimedia.org/wikipedia/commons/thumb/3/3a/Cat03.jpg/481px-Cat03.jpg"),
         current_page="busDashboard"
     )
 
@@ -129,11 +133,11 @@ async def test_api_key_validation():
     return True
 
 
-async def test_error_handling():
+async def test_error_handling(processor: "GeminiMultimodalProcessor"):
     """Test error handling with invalid input."""
-    print_section("Test 5: Error Handling")
+    from app.multimodal.gemini_wrapper import MultimodalInput
 
-    processor = GeminiMultimodalProcessor()
+    print_section("Test 5: Error Handling")
 
     # Test with empty input
     print("\n1. Testing with empty input...")
@@ -161,19 +165,26 @@ async def main():
         print("\n❌ Cannot proceed without OPENROUTER_API_KEY")
         return
 
+    from app.multimodal.gemini_wrapper import GeminiMultimodalProcessor
+    from app.utils.llm_cache import LLMCache
+    from app.utils.openrouter import OpenRouterClient
+
+    # One processor (and one OpenRouter connection pool) shared by every test
+    processor = GeminiMultimodalProcessor(OpenRouterClient(cache=LLMCache(LLM_CACHE_PATH)))
+
     try:
         # Test 1: Simple text processing
-        await test_text_only_with_ai()
+        await test_text_only_with_ai(processor)
 
         # Test 2: Transport-specific intent extraction
-        await test_transport_specific_intent()
+        await test_transport_specific_intent(processor)
 
         # Test 3: Multimodal with image
         print("\n⚠️  Skipping image test (requires valid image URL)")
-        # await test_multimodal_with_image()  # Skip to avoid external dependencies
+        # await test_multimodal_with_image(processor)  # Skip to avoid external dependencies
 
         # Test 4: Error handling
-        await test_error_handling()
+        await test_error_handling(processor)
 
         print("\n" + "=" * 80)
         print("  OpenRouter Integration Tests Complete!")
@@ -188,6 +199,9 @@ async def main():
         import traceback
         traceback.print_exc()
 
+    finally:
+        await processor.close()
+
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -5,40 +5,118 @@ Critical test: "Bulk - 00:01" trip with 25% booking (HIGH RISK scenario)
 """
 
 import asyncio
+import os
+from contextlib import asynccontextmanager
+from sqlalchemy import delete, select
+
 from app.agent.state import create_initial_state
-from app.agent.nodes.preprocess import preprocess_input_node
-from app.agent.nodes.classify import classify_intent_node
+from app.agent.nodes.pipeline import run_preclassify
 from app.agent.nodes.consequences import check_consequences_node
+from app.api.deps import bound_session
+from app.core.database import AsyncSessionLocal
+from app.models.daily_trip import DailyTrip
+from app.models.route import Route
+from app.utils.logger import setup_logger
+
+# Per-step detail is logged at INFO; banners and the summary at WARNING.
+# Set TEST_LOG=INFO to see the detail.
+logger = setup_logger(
+    "phase4_tests",
+    level=os.environ.get("TEST_LOG", "WARNING"),
+    format_string="%(message)s",
+    use_colors=False,
+)
+
+# Trip seeded for the low-risk scenario: 0% booked, no vehicle assigned
+ZERO_BOOKING_TRIP = "Seeded Trip - 23:59"
+
+
+@asynccontextmanager
+async def _zero_booking_trip():
+    """Insert ZERO_BOOKING_TRIP for the duration of the test and yield its name."""
+    async with AsyncSessionLocal() as db:
+        # Drop a leftover from an interrupted run so the name lookup stays unique
+        await db.execute(delete(DailyTrip).where(DailyTrip.display_name == ZERO_BOOKING_TRIP))
+        route_id = await db.scalar(select(Route.route_id).limit(1))
+        trip = DailyTrip(
+            route_id=route_id,
+            display_name=ZERO_BOOKING_TRIP,
+            booking_percentage=0,
+            live_status="Scheduled",
+        )
+        db.add(trip)
+        await db.commit()
 
+        try:
+            yield ZERO_BOOKING_TRIP
+        finally:
+            await db.delete(trip)
+            await db.commit()
 
-async def test_consequence_scenarios():
-    """Test consequence checking for different risk scenarios."""
-    print("\n" + "="*60)
-    print("PHASE 4c TEST: Check Consequences Node")
-    print("="*60)
 
-    # Test 1: HIGH RISK - Remove vehicle from trip with bookings (Bulk - 00:01)
-    print("\n✅ Test 1: HIGH RISK - Remove vehicle from Bulk - 00:01 (25% booked)")
-    state1 = create_initial_state(
-        user_input="Remove vehicle from Bulk - 00:01 trip",
-        session_id="test-consequences-1",
+async def _run_node_chain(user_input: str, session_id: str):
+    """Run preprocess -> classify -> check_consequences for one input."""
+    state = create_initial_state(
+        user_input=user_input,
+        session_id=session_id,
         context={"page": "busDashboard"}
     )
 
-    # Preprocess
-    preprocess_result1 = await preprocess_input_node(state1)
-    state1.update(preprocess_result1)
+    # Preprocess + classify intent
+    classify_result = await run_preclassify(state)
+    state.update(classify_result)
+
+    # Check consequences
+    consequence_result = await check_consequences_node(state)
 
-    # Classify intent
-    classify_result1 = await classify_intent_node(state1)
-    state1.update(classify_result1)
+    return state, classify_result, consequence_result
 
-    print(f"   Input: '{state1['user_input']}'")
-    print(f"   Intent: {classify_result1.get('intent')}")
-    print(f"   Requires consequence check: {classify_result1.get('requires_consequence_check')}")
 
-    # Check consequences
-    consequence_result1 = await check_consequences_node(state1)
+# Each scenario binds its own session: the nodes it runs reuse it through
+# get_db(), while the scenarios themselves run concurrently on separate sessions
+
+async def _scenario_high_risk():
+    """Remove vehicle from Bulk - 00:01 (25% booked)."""
+    async with bound_session():
+        return await _run_node_chain("Remove vehicle from Bulk - 00:01 trip", "test-consequences-1")
+
+
+async def _scenario_low_risk(trip_name: str):
+    """Remove vehicle from a trip without bookings."""
+    async with bound_session():
+        return await _run_node_chain(
+            f"Remove vehicle from {trip_name} trip", "test-consequences-2"
+        )
+
+
+async def _scenario_read():
+    """READ operation - no consequence checking needed."""
+    async with bound_session():
+        return await _run_node_chain("How many unassigned vehicles are available?", "test-consequences-3")
+
+
+async def test_consequence_scenarios():
+    """Test consequence checking for different risk scenarios."""
+    logger.warning("\n" + "="*60)
+    logger.warning("PHASE 4c TEST: Check Consequences Node")
+    logger.warning("="*60)
+
+    # The scenarios share no state, so run their node chains concurrently and
+    # report/verify them in order afterwards
+    async with _zero_booking_trip() as zero_booking_trip:
+        high_risk, low_risk, read = await asyncio.gather(
+            _scenario_high_risk(),
+            _scenario_low_risk(zero_booking_trip),
+            _scenario_read(),
+        )
+
+    # Test 1: HIGH RISK - Remove vehicle from trip with bookings (Bulk - 00:01)
+    logger.info("\n✅ Test 1: HIGH RISK - Remove vehicle from Bulk - 00:01 (25% booked)")
+    state1, classify_result1, consequence_result1 = high_risk
+
+    logger.info(f"   Input: '{state1['user_input']}'")
+    logger.info(f"   Intent: {classify_result1.get('intent')}")
+    logger.info(f"   Requires consequence check: {classify_result1.get('requires_consequence_check')}")
 
     assert consequence_result1.get("error") is None, f"Error: {consequence_result1.get('error')}"
 
@@ -46,17 +124,17 @@ async def test_consequence_scenarios():
     requires_confirmation1 = consequence_result1.get("requires_confirmation")
     consequences1 = consequence_result1.get("consequences")
 
-    print(f"   ✅ Risk level: {risk_level1}")
-    print(f"   ✅ Requires confirmation: {requires_confirmation1}")
+    logger.info(f"   ✅ Risk level: {risk_level1}")
+    logger.info(f"   ✅ Requires confirmation: {requires_confirmation1}")
 
     if consequences1:
-        print(f"   ✅ Trip: {consequences1.get('trip_name')}")
-        print(f"   ✅ Booking percentage: {consequences1.get('booking_percentage')}%")
-        print(f"   ✅ Affected bookings: {consequences1.get('affected_bookings')}")
-        print(f"   ✅ Explanation:")
+        logger.info(f"   ✅ Trip: {consequences1.get('trip_name')}")
+        logger.info(f"   ✅ Booking percentage: {consequences1.get('booking_percentage')}%")
+        logger.info(f"   ✅ Affected bookings: {consequences1.get('affected_bookings')}")
+        logger.info(f"   ✅ Explanation:")
         explanation_lines = consequences1.get('explanation', '').split('\n')
         for line in explanation_lines[:3]:  # Show first 3 lines
-            print(f"      {line}")
+            logger.info(f"      {line}")
 
     # Verify HIGH RISK
     assert risk_level1 == "high", f"Expected high risk, got {risk_level1}"
@@ -65,96 +143,52 @@ async def test_consequence_scenarios():
     assert consequences1.get("booking_percentage") == 25, "Bulk - 00:01 should have 25% booking"
 
     # Test 2: LOW RISK - Remove vehicle from trip without bookings
-    print("\n✅ Test 2: LOW RISK - Remove vehicle from trip without bookings")
-    # First, let's find a trip without bookings
-    from app.core.database import AsyncSessionLocal
-    from app.models.daily_trip import DailyTrip
-    from sqlalchemy import select
-
-    async with AsyncSessionLocal() as db:
-        # Find trip with 0% booking
-        result = await db.execute(
-            select(DailyTrip).where(DailyTrip.booking_percentage == 0).limit(1)
-        )
-        trip_no_bookings = result.scalar_one_or_none()
+    logger.info("\n✅ Test 2: LOW RISK - Remove vehicle from trip without bookings")
 
-        if trip_no_bookings:
-            state2 = create_initial_state(
-                user_input=f"Remove vehicle from {trip_no_bookings.display_name} trip",
-                session_id="test-consequences-2",
-                context={"page": "busDashboard"}
-            )
+    state2, classify_result2, consequence_result2 = low_risk
 
-            # Preprocess
-            preprocess_result2 = await preprocess_input_node(state2)
-            state2.update(preprocess_result2)
+    logger.info(f"   Input: '{state2['user_input']}'")
+    logger.info(f"   Intent: {classify_result2.get('intent')}")
 
-            # Classify intent
-            classify_result2 = await classify_intent_node(state2)
-            state2.update(classify_result2)
+    risk_level2 = consequence_result2.get("risk_level")
+    requires_confirmation2 = consequence_result2.get("requires_confirmation")
+    consequences2 = consequence_result2.get("consequences")
 
-            print(f"   Input: '{state2['user_input']}'")
-            print(f"   Intent: {classify_result2.get('intent')}")
+    logger.info(f"   ✅ Risk level: {risk_level2}")
+    logger.info(f"   ✅ Requires confirmation: {requires_confirmation2}")
 
-            # Check consequences
-            consequence_result2 = await check_consequences_node(state2)
+    if consequences2:
+        logger.info(f"   ✅ Booking percentage: {consequences2.get('booking_percentage')}%")
+        logger.info(f"   ✅ Explanation: {consequences2.get('explanation')[:100]}...")
 
-            risk_level2 = consequence_result2.get("risk_level")
-            requires_confirmation2 = consequence_result2.get("requires_confirmation")
-            consequences2 = consequence_result2.get("consequences")
-
-            print(f"   ✅ Risk level: {risk_level2}")
-            print(f"   ✅ Requires confirmation: {requires_confirmation2}")
-
-            if consequences2:
-                print(f"   ✅ Booking percentage: {consequences2.get('booking_percentage')}%")
-                print(f"   ✅ Explanation: {consequences2.get('explanation')[:100]}...")
-
-            # Verify LOW RISK (could also be NONE if no vehicle assigned)
-            assert risk_level2 in ["low", "none"], f"Expected low/none risk, got {risk_level2}"
-            print(f"   ✅ Correctly identified as {risk_level2.upper()} risk")
-        else:
-            print("   ⚠️  No trip with 0% booking found, skipping low-risk test")
+    # Verify LOW RISK (could also be NONE if no vehicle assigned)
+    assert risk_level2 in ["low", "none"], f"Expected low/none risk, got {risk_level2}"
+    logger.info(f"   ✅ Correctly identified as {risk_level2.upper()} risk")
 
     # Test 3: READ operation - No consequence checking needed
-    print("\n✅ Test 3: READ operation - No consequences needed")
-    state3 = create_initial_state(
-        user_input="How many unassigned vehicles are available?",
-        session_id="test-consequences-3",
-        context={"page": "busDashboard"}
-    )
-
-    # Preprocess
-    preprocess_result3 = await preprocess_input_node(state3)
-    state3.update(preprocess_result3)
-
-    # Classify intent
-    classify_result3 = await classify_intent_node(state3)
-    state3.update(classify_result3)
-
-    print(f"   Input: '{state3['user_input']}'")
-    print(f"   Action type: {classify_result3.get('action_type')}")
-    print(f"   Requires consequence check: {classify_result3.get('requires_consequence_check')}")
+    logger.info("\n✅ Test 3: READ operation - No consequences needed")
+    state3, classify_result3, consequence_result3 = read
 
-    # Check consequences (should skip)
-    consequence_result3 = await check_consequences_node(state3)
+    logger.info(f"   Input: '{state3['user_input']}'")
+    logger.info(f"   Action type: {classify_result3.get('action_type')}")
+    logger.info(f"   Requires consequence check: {classify_result3.get('requires_consequence_check')}")
 
     risk_level3 = consequence_result3.get("risk_level")
     requires_confirmation3 = consequence_result3.get("requires_confirmation")
 
-    print(f"   ✅ Risk level: {risk_level3}")
-    print(f"   ✅ Requires confirmation: {requires_confirmation3}")
+    logger.info(f"   ✅ Risk level: {risk_level3}")
+    logger.info(f"   ✅ Requires confirmation: {requires_confirmation3}")
 
     # Verify no consequence checking
     assert risk_level3 == "none", "READ operations should have no risk"
     assert requires_confirmation3 == False, "READ operations don't need confirmation"
 
     # Test 4: Verify consequence details structure
-    print("\n✅ Test 4: Verify consequence details for Bulk - 00:01")
+    logger.info("\n✅ Test 4: Verify consequence details for Bulk - 00:01")
 
     # Use the consequence result from Test 1
     if consequences1:
-        print(f"   ✅ Consequence structure validation:")
+        logger.info(f"   ✅ Consequence structure validation:")
         required_fields = [
             "risk_level", "action_type", "entity_id", "trip_name",
             "booking_percentage", "has_deployment", "consequences",
@@ -163,26 +197,26 @@ async def test_consequence_scenarios():
 
         for field in required_fields:
             assert field in consequences1, f"Missing field: {field}"
-            print(f"      ✓ {field}: {type(consequences1[field]).__name__}")
+            logger.info(f"      ✓ {field}: {type(consequences1[field]).__name__}")
 
         # Verify consequence list
         consequence_list = consequences1.get("consequences", [])
         assert len(consequence_list) > 0, "Consequences list should not be empty"
-        print(f"   ✅ Number of consequences: {len(consequence_list)}")
-        print(f"   ✅ Sample consequences:")
+        logger.info(f"   ✅ Number of consequences: {len(consequence_list)}")
+        logger.info(f"   ✅ Sample consequences:")
         for i, cons in enumerate(consequence_list[:3], 1):
-            print(f"      {i}. {cons}")
-
-    print("\n" + "="*60)
-    print("🎉 All Phase 4c tests PASSED!")
-    print("="*60)
-    print("\nSummary:")
-    print("- ✅ HIGH RISK scenario detected (Bulk - 00:01 with 25% booking)")
-    print("- ✅ Consequence checking correctly flags for confirmation")
-    print("- ✅ LOW/NONE RISK scenarios handled correctly")
-    print("- ✅ READ operations skip consequence checking")
-    print("- ✅ Consequence data structure validated")
-    print("- ✅ Tribal knowledge rules enforced")
+            logger.info(f"      {i}. {cons}")
+
+    logger.warning("\n" + "="*60)
+    logger.warning("🎉 All Phase 4c tests PASSED!")
+    logger.warning("="*60)
+    logger.warning("\nSummary:")
+    logger.warning("- ✅ HIGH RISK scenario detected (Bulk - 00:01 with 25% booking)")
+    logger.warning("- ✅ Consequence checking correctly flags for confirmation")
+    logger.warning("- ✅ LOW/NONE RISK scenarios handled correctly")
+    logger.warning("- ✅ READ operations skip consequence checking")
+    logger.warning("- ✅ Consequence data structure validated")
+    logger.warning("- ✅ Tribal knowledge rules enforced")
 
     return True
 
@@ -193,9 +227,7 @@ async def main():
         success = await test_consequence_scenarios()
         return 0 if success else 1
     except Exception as e:
-        print(f"\n❌ Phase 4c test FAILED: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"\n❌ Phase 4c test FAILED: {e}")
         return 1
 
 
@@ -5,8 +5,7 @@ Tests confirmation message generation with real Claude API calls
 
 import asyncio
 from app.agent.state import create_initial_state
-from app.agent.nodes.preprocess import preprocess_input_node
-from app.agent.nodes.classify import classify_intent_node
+from app.agent.nodes.pipeline import run_preclassify
 from app.agent.nodes.consequences import check_consequences_node
 from app.agent.nodes.confirmation import request_confirmation_node
 
@@ -26,10 +25,7 @@ async def test_confirmation_scenarios():
     )
 
     # Run through preprocess -> classify -> consequences pipeline
-    preprocess_result1 = await preprocess_input_node(state1)
-    state1.update(preprocess_result1)
-
-    classify_result1 = await classify_intent_node(state1)
+    classify_result1 = await run_preclassify(state1)
     state1.update(classify_result1)
 
     consequence_result1 = await check_consequences_node(state1)
@@ -68,10 +64,7 @@ async def test_confirmation_scenarios():
     )
 
     # Run through pipeline
-    preprocess_result2 = await preprocess_input_node(state2)
-    state2.update(preprocess_result2)
-
-    classify_result2 = await classify_intent_node(state2)
+    classify_result2 = await run_preclassify(state2)
     state2.update(classify_result2)
 
     consequence_result2 = await check_consequences_node(state2)
@@ -128,22 +121,19 @@ async def test_confirmation_scenarios():
     state4 = create_initial_state(
         user_input="Delete trip Bulk - 00:01",
         session_id="test-confirmation-4",
-        context={"page": "busDashboard"}
-    )
-
-    # Set high-risk flags manually
-    state4.update({
-        "intent": "delete_trip",
-        "action_type": "delete",
-        "requires_confirmation": True,
-        "risk_level": "high",
-        "consequences": {
+        context={"page": "busDashboard"},
+        # Set high-risk flags manually
+        intent="delete_trip",
+        action_type="delete",
+        requires_confirmation=True,
+        risk_level="high",
+        consequences={
             "risk_level": "high",
             "action_type": "delete_trip",
             "affected_bookings": 10,
             "explanation": "This trip has 25% bookings. Deleting will cancel all bookings."
         }
-    })
+    )
 
     # Request confirmation
     confirmation_result4 = await request_confirmation_node(state4)
@@ -7,6 +7,7 @@ import asyncio
 from app.agent.state import create_initial_state
 from app.agent.nodes.preprocess import preprocess_input_node
 from app.agent.nodes.classify import classify_intent_node
+from app.agent.nodes.pipeline import run_preclassify
 from app.agent.nodes.consequences import check_consequences_node
 from app.agent.nodes.confirmation import request_confirmation_node
 from app.agent.nodes.execute import execute_action_node
@@ -176,8 +177,7 @@ async def test_end_to_end_with_openrouter():
 
     # Run full pipeline
     print(f"\n   🔄 Running full pipeline with OpenRouter...")
-    state3.update(await preprocess_input_node(state3))
-    state3.update(await classify_intent_node(state3))
+    state3.update(await run_preclassify(state3))
     state3.update(await check_consequences_node(state3))
     state3.update(await request_confirmation_node(state3))
     state3.update(await execute_action_node(state3))
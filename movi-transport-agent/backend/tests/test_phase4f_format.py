@@ -4,269 +4,259 @@ Tests response formatting with real Claude API via OpenRouter
 """
 
 import asyncio
+import os
 from app.agent.state import create_initial_state
 from app.agent.nodes.format import format_response_node
+from app.utils.logger import setup_logger
+
+# Per-step detail is logged at INFO; banners and the summary at WARNING.
+# Set TEST_LOG=INFO to see the detail.
+logger = setup_logger(
+    "phase4_tests",
+    level=os.environ.get("TEST_LOG", "WARNING"),
+    format_string="%(message)s",
+    use_colors=False,
+)
+
+# Cap on concurrent format_response_node calls (the success cases hit the LLM)
+MAX_CONCURRENT_FORMATS = 4
+
+
+async def _format(llm_slots: asyncio.Semaphore, user_input: str, session_id: str, page: str, **state_update):
+    """Build a state as if execute already ran, then run format_response_node on it."""
+    state = create_initial_state(
+        user_input=user_input,
+        session_id=session_id,
+        context={"page": page},
+        **state_update
+    )
+    async with llm_slots:
+        return state, await format_response_node(state)
 
 
 async def test_response_formatting():
     """Test formatting of different response types with Claude."""
-    print("\n" + "="*60)
-    print("PHASE 4f TEST: Format Response Node with OpenRouter")
-    print("="*60)
-
-    # Test 1: Format successful READ operation
-    print("\n✅ Test 1: Format SUCCESS response - READ operation")
-    state1 = create_initial_state(
-        user_input="How many unassigned vehicles are there?",
-        session_id="test-format-1",
-        context={"page": "busDashboard"}
+    logger.warning("\n" + "="*60)
+    logger.warning("PHASE 4f TEST: Format Response Node with OpenRouter")
+    logger.warning("="*60)
+
+    # The seven cases are independent, so format them concurrently (at most
+    # MAX_CONCURRENT_FORMATS LLM calls at a time) and report them in order.
+    llm_slots = asyncio.Semaphore(MAX_CONCURRENT_FORMATS)
+    (
+        (state1, format_result1),
+        (state2, format_result2),
+        (state3, format_result3),
+        (state4, format_result4),
+        (state5, format_result5),
+        (state6, format_result6),
+        (state7, format_result7),
+    ) = await asyncio.gather(
+        # Test 1: successful READ operation
+        _format(
+            llm_slots,
+            "How many unassigned vehicles are there?", "test-format-1", "busDashboard",
+            intent="get_unassigned_vehicles",
+            action_type="read",
+            tool_name="get_unassigned_vehicles_count",
+            execution_success=True,
+            tool_results={
+                "success": True,
+                "message": "Successfully retrieved unassigned vehicles count",
+                "data": {
+                    "unassigned_count": 3,
+                    "unassigned_vehicles": [
+                        {"license_plate": "MH-12-3456", "type": "Bus", "capacity": 45},
+                        {"license_plate": "KA-01-9876", "type": "Cab", "capacity": 4},
+                        {"license_plate": "MH-02-1111", "type": "Bus", "capacity": 40}
+                    ]
+                }
+            },
+        ),
+        # Test 2: successful WRITE operation
+        _format(
+            llm_slots,
+            "Create a stop called Test Stop at Gavipuram", "test-format-2", "manageRoute",
+            intent="create_stop",
+            action_type="write",
+            tool_name="create_stop",
+            execution_success=True,
+            tool_results={
+                "success": True,
+                "message": "Stop created successfully",
+                "data": {
+                    "stop_id": 42,
+                    "name": "Test Stop",
+                    "latitude": 12.9716,
+                    "longitude": 77.6412
+                }
+            },
+        ),
+        # Test 3: successful DELETE operation
+        _format(
+            llm_slots,
+            "Remove vehicle from trip", "test-format-3", "busDashboard",
+            intent="remove_vehicle",
+            action_type="delete",
+            tool_name="remove_vehicle_from_trip",
+            user_confirmed=True,
+            execution_success=True,
+            tool_results={
+                "success": True,
+                "message": "Vehicle removed from trip successfully",
+                "data": {
+                    "trip_id": 1,
+                    "removed_vehicle": "MH-12-3456",
+                    "affected_bookings": 0,
+                    "vehicle_now_available": True
+                }
+            },
+        ),
+        # Test 4: ERROR response
+        _format(
+            llm_slots,
+            "Remove vehicle from nonexistent trip", "test-format-4", "busDashboard",
+            intent="remove_vehicle",
+            action_type="delete",
+            tool_name="remove_vehicle_from_trip",
+            execution_success=False,
+            execution_error="Trip ID 999 not found in database",
+            error="Trip not found",
+            error_node="execute_action_node",
+        ),
+        # Test 5: CONFIRMATION response (waiting for user)
+        _format(
+            llm_slots,
+            "Remove vehicle MH-12-3456 from Bulk - 00:01", "test-format-5", "busDashboard",
+            intent="remove_vehicle",
+            action_type="delete",
+            requires_confirmation=True,
+            user_confirmed=False,
+            confirmation_message="⚠️ Confirmation Required\n\nYou're about to remove vehicle MH-12-3456 from the Bulk - 00:01 trip.\n\nImpact:\n- This trip is currently 25% booked\n- Removing the vehicle will cancel approximately 15 bookings\n\nDo you want to proceed?",
+        ),
+        # Test 6: INFO response (no tool execution)
+        _format(
+            llm_slots,
+            "What is the status?", "test-format-6", "busDashboard",
+            intent="get_status",
+            action_type="read",
+            # No tool execution occurred - explicitly set these
+            execution_success=None,
+            tool_results=None,
+        ),
+        # Test 7: fallback when Claude returns empty (edge case)
+        _format(
+            llm_slots,
+            "List stops", "test-format-7", "manageRoute",
+            intent="list_stops",
+            action_type="read",
+            tool_name="list_all_stops",
+            execution_success=True,
+            tool_results={
+                "success": True,
+                "message": "Retrieved 10 stops",
+                "data": {"count": 10}
+            },
+        ),
     )
 
-    # Simulate successful tool execution
-    state1.update({
-        "intent": "get_unassigned_vehicles",
-        "action_type": "read",
-        "tool_name": "get_unassigned_vehicles_count",
-        "execution_success": True,
-        "tool_results": {
-            "success": True,
-            "message": "Successfully retrieved unassigned vehicles count",
-            "data": {
-                "unassigned_count": 3,
-                "unassigned_vehicles": [
-                    {"license_plate": "MH-12-3456", "type": "Bus", "capacity": 45},
-                    {"license_plate": "KA-01-9876", "type": "Cab", "capacity": 4},
-                    {"license_plate": "MH-02-1111", "type": "Bus", "capacity": 40}
-                ]
-            }
-        }
-    })
-
-    print(f"   Tool: {state1['tool_name']}")
-    print(f"   Input: '{state1['user_input']}'")
-
-    # Format response with Claude
-    format_result1 = await format_response_node(state1)
+    # Test 1: Format successful READ operation
+    logger.info("\n✅ Test 1: Format SUCCESS response - READ operation")
+    logger.info(f"   Tool: {state1['tool_name']}")
+    logger.info(f"   Input: '{state1['user_input']}'")
 
     assert format_result1.get("error") is None, f"Error: {format_result1.get('error')}"
     assert format_result1.get("response_type") == "success", "Should be success response"
     assert format_result1.get("response"), "Should have formatted response"
 
-    print(f"   ✅ Response type: {format_result1['response_type']}")
-    print(f"   ✅ Formatted response ({len(format_result1['response'])} chars):")
-    print(f"   {format_result1['response']}")
+    logger.info(f"   ✅ Response type: {format_result1['response_type']}")
+    logger.info(f"   ✅ Formatted response ({len(format_result1['response'])} chars):")
+    logger.info(f"   {format_result1['response']}")
 
     # Test 2: Format successful WRITE operation
-    print("\n✅ Test 2: Format SUCCESS response - WRITE operation")
-    state2 = create_initial_state(
-        user_input="Create a stop called Test Stop at Gavipuram",
-        session_id="test-format-2",
-        context={"page": "manageRoute"}
-    )
-
-    state2.update({
-        "intent": "create_stop",
-        "action_type": "write",
-        "tool_name": "create_stop",
-        "execution_success": True,
-        "tool_results": {
-            "success": True,
-            "message": "Stop created successfully",
-            "data": {
-                "stop_id": 42,
-                "name": "Test Stop",
-                "latitude": 12.9716,
-                "longitude": 77.6412
-            }
-        }
-    })
-
-    print(f"   Tool: {state2['tool_name']}")
-    print(f"   Input: '{state2['user_input']}'")
-
-    # Format response with Claude
-    format_result2 = await format_response_node(state2)
+    logger.info("\n✅ Test 2: Format SUCCESS response - WRITE operation")
+    logger.info(f"   Tool: {state2['tool_name']}")
+    logger.info(f"   Input: '{state2['user_input']}'")
 
     assert format_result2.get("error") is None, f"Error: {format_result2.get('error')}"
     assert format_result2.get("response_type") == "success", "Should be success response"
 
-    print(f"   ✅ Response type: {format_result2['response_type']}")
-    print(f"   ✅ Formatted response:")
-    print(f"   {format_result2['response']}")
+    logger.info(f"   ✅ Response type: {format_result2['response_type']}")
+    logger.info(f"   ✅ Formatted response:")
+    logger.info(f"   {format_result2['response']}")
 
     # Test 3: Format successful DELETE operation
-    print("\n✅ Test 3: Format SUCCESS response - DELETE operation")
-    state3 = create_initial_state(
-        user_input="Remove vehicle from trip",
-        session_id="test-format-3",
-        context={"page": "busDashboard"}
-    )
-
-    state3.update({
-        "intent": "remove_vehicle",
-        "action_type": "delete",
-        "tool_name": "remove_vehicle_from_trip",
-        "user_confirmed": True,
-        "execution_success": True,
-        "tool_results": {
-            "success": True,
-            "message": "Vehicle removed from trip successfully",
-            "data": {
-                "trip_id": 1,
-                "removed_vehicle": "MH-12-3456",
-                "affected_bookings": 0,
-                "vehicle_now_available": True
-            }
-        }
-    })
-
-    print(f"   Tool: {state3['tool_name']}")
-    print(f"   Input: '{state3['user_input']}'")
-
-    # Format response with Claude
-    format_result3 = await format_response_node(state3)
+    logger.info("\n✅ Test 3: Format SUCCESS response - DELETE operation")
+    logger.info(f"   Tool: {state3['tool_name']}")
+    logger.info(f"   Input: '{state3['user_input']}'")
 
     assert format_result3.get("error") is None, f"Error: {format_result3.get('error')}"
     assert format_result3.get("response_type") == "success", "Should be success response"
 
-    print(f"   ✅ Response type: {format_result3['response_type']}")
-    print(f"   ✅ Formatted response:")
-    print(f"   {format_result3['response']}")
+    logger.info(f"   ✅ Response type: {format_result3['response_type']}")
+    logger.info(f"   ✅ Formatted response:")
+    logger.info(f"   {format_result3['response']}")
 
     # Test 4: Format ERROR response
-    print("\n✅ Test 4: Format ERROR response")
-    state4 = create_initial_state(
-        user_input="Remove vehicle from nonexistent trip",
-        session_id="test-format-4",
-        context={"page": "busDashboard"}
-    )
-
-    state4.update({
-        "intent": "remove_vehicle",
-        "action_type": "delete",
-        "tool_name": "remove_vehicle_from_trip",
-        "execution_success": False,
-        "execution_error": "Trip ID 999 not found in database",
-        "error": "Trip not found",
-        "error_node": "execute_action_node"
-    })
-
-    print(f"   Tool: {state4['tool_name']}")
-    print(f"   Error: {state4['execution_error']}")
-
-    # Format error response
-    format_result4 = await format_response_node(state4)
+    logger.info("\n✅ Test 4: Format ERROR response")
+    logger.info(f"   Tool: {state4['tool_name']}")
+    logger.info(f"   Error: {state4['execution_error']}")
 
     assert format_result4.get("response_type") == "error", "Should be error response"
     assert format_result4.get("response"), "Should have formatted error message"
 
-    print(f"   ✅ Response type: {format_result4['response_type']}")
-    print(f"   ✅ Formatted error:")
-    print(f"   {format_result4['response']}")
+    logger.info(f"   ✅ Response type: {format_result4['response_type']}")
+    logger.info(f"   ✅ Formatted error:")
+    logger.info(f"   {format_result4['response']}")
 
     # Test 5: Format CONFIRMATION response (waiting for user)
-    print("\n✅ Test 5: Format CONFIRMATION response")
-    state5 = create_initial_state(
-        user_input="Remove vehicle MH-12-3456 from Bulk - 00:01",
-        session_id="test-format-5",
-        context={"page": "busDashboard"}
-    )
-
-    state5.update({
-        "intent": "remove_vehicle",
-        "action_type": "delete",
-        "requires_confirmation": True,
-        "user_confirmed": False,
-        "confirmation_message": "⚠️ Confirmation Required\n\nYou're about to remove vehicle MH-12-3456 from the Bulk - 00:01 trip.\n\nImpact:\n- This trip is currently 25% booked\n- Removing the vehicle will cancel approximately 15 bookings\n\nDo you want to proceed?"
-    })
-
-    print(f"   Intent: {state5['intent']}")
-    print(f"   Requires confirmation: {state5['requires_confirmation']}")
-
-    # Format confirmation response
-    format_result5 = await format_response_node(state5)
+    logger.info("\n✅ Test 5: Format CONFIRMATION response")
+    logger.info(f"   Intent: {state5['intent']}")
+    logger.info(f"   Requires confirmation: {state5['requires_confirmation']}")
 
     assert format_result5.get("response_type") == "confirmation", "Should be confirmation response"
     assert format_result5.get("response"), "Should have confirmation message"
 
-    print(f"   ✅ Response type: {format_result5['response_type']}")
-    print(f"   ✅ Confirmation message:")
-    print(f"   {format_result5['response']}")
+    logger.info(f"   ✅ Response type: {format_result5['response_type']}")
+    logger.info(f"   ✅ Confirmation message:")
+    logger.info(f"   {format_result5['response']}")
 
     # Test 6: Format INFO response (no tool execution)
-    print("\n✅ Test 6: Format INFO response (no tool execution)")
-    state6 = create_initial_state(
-        user_input="What is the status?",
-        session_id="test-format-6",
-        context={"page": "busDashboard"}
-    )
-
-    state6.update({
-        "intent": "get_status",
-        "action_type": "read",
-        # No tool execution occurred - explicitly set these
-        "execution_success": None,
-        "tool_results": None,
-    })
-
-    print(f"   Intent: {state6['intent']}")
-    print(f"   No tool executed")
-
-    # Format info response
-    format_result6 = await format_response_node(state6)
+    logger.info("\n✅ Test 6: Format INFO response (no tool execution)")
+    logger.info(f"   Intent: {state6['intent']}")
+    logger.info(f"   No tool executed")
 
     assert format_result6.get("response_type") == "info", f"Should be info response, got: {format_result6.get('response_type')}"
     assert format_result6.get("response"), "Should have info message"
 
-    print(f"   ✅ Response type: {format_result6['response_type']}")
-    print(f"   ✅ Info message:")
-    print(f"   {format_result6['response']}")
+    logger.info(f"   ✅ Response type: {format_result6['response_type']}")
+    logger.info(f"   ✅ Info message:")
+    logger.info(f"   {format_result6['response']}")
 
     # Test 7: Test fallback when Claude returns empty (edge case)
-    print("\n✅ Test 7: Test fallback formatting (no Claude)")
-    state7 = create_initial_state(
-        user_input="List stops",
-        session_id="test-format-7",
-        context={"page": "manageRoute"}
-    )
-
-    state7.update({
-        "intent": "list_stops",
-        "action_type": "read",
-        "tool_name": "list_all_stops",
-        "execution_success": True,
-        "tool_results": {
-            "success": True,
-            "message": "Retrieved 10 stops",
-            "data": {"count": 10}
-        }
-    })
-
-    print(f"   Tool: {state7['tool_name']}")
-
-    # This should work with Claude or fall back gracefully
-    format_result7 = await format_response_node(state7)
+    logger.info("\n✅ Test 7: Test fallback formatting (no Claude)")
+    logger.info(f"   Tool: {state7['tool_name']}")
 
     assert format_result7.get("response_type") == "success", "Should be success response"
     assert format_result7.get("response"), "Should have response (Claude or fallback)"
 
-    print(f"   ✅ Response type: {format_result7['response_type']}")
-    print(f"   ✅ Response (Claude or fallback):")
-    print(f"   {format_result7['response']}")
-
-    print("\n" + "="*60)
-    print("🎉 All Phase 4f tests PASSED!")
-    print("="*60)
-    print("\nSummary:")
-    print("- ✅ SUCCESS responses formatted with Claude")
-    print("- ✅ READ operations formatted naturally")
-    print("- ✅ WRITE operations formatted with next steps")
-    print("- ✅ DELETE operations formatted with safety notes")
-    print("- ✅ ERROR responses translated to user-friendly messages")
-    print("- ✅ CONFIRMATION responses passed through unchanged")
-    print("- ✅ INFO responses generated for non-tool queries")
-    print("- ✅ Fallback formatting works when Claude unavailable")
-    print("- ✅ Real Claude API integration successful")
+    logger.info(f"   ✅ Response type: {format_result7['response_type']}")
+    logger.info(f"   ✅ Response (Claude or fallback):")
+    logger.info(f"   {format_result7['response']}")
+
+    logger.warning("\n" + "="*60)
+    logger.warning("🎉 All Phase 4f tests PASSED!")
+    logger.warning("="*60)
+    logger.warning("\nSummary:")
+    logger.warning("- ✅ SUCCESS responses formatted with Claude")
+    logger.warning("- ✅ READ operations formatted naturally")
+    logger.warning("- ✅ WRITE operations formatted with next steps")
+    logger.warning("- ✅ DELETE operations formatted with safety notes")
+    logger.warning("- ✅ ERROR responses translated to user-friendly messages")
+    logger.warning("- ✅ CONFIRMATION responses passed through unchanged")
+    logger.warning("- ✅ INFO responses generated for non-tool queries")
+    logger.warning("- ✅ Fallback formatting works when Claude unavailable")
+    logger.warning("- ✅ Real Claude API integration successful")
 
     return True
 
@@ -277,9 +267,7 @@ async def main():
         success = await test_response_formatting()
         return 0 if success else 1
     except Exception as e:
-        print(f"\n❌ Phase 4f test FAILED: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"\n❌ Phase 4f test FAILED: {e}")
         return 1
 
 
@@ -4,6 +4,7 @@ Tests conditional routing logic for LangGraph
 """
 
 import asyncio
+import os
 from app.agent.state import create_initial_state
 from app.agent.edges import (
     route_after_classify,
@@ -12,257 +13,217 @@ from app.agent.edges import (
     route_after_execute,
     get_routing_explanation,
 )
+from app.utils.logger import setup_logger
+
+# Per-step detail is logged at INFO; banners and the summary at WARNING.
+# Set TEST_LOG=INFO to see the detail.
+logger = setup_logger(
+    "phase5_tests",
+    level=os.environ.get("TEST_LOG", "WARNING"),
+    format_string="%(message)s",
+    use_colors=False,
+)
 
 
-async def test_edge_routing():
-    """Test conditional routing logic for all edge functions."""
-    print("\n" + "="*60)
-    print("PHASE 5 TEST: Edge Routing Functions")
-    print("="*60)
-
-    # Test 1: route_after_classify - No consequence check needed (READ)
-    print("\n✅ Test 1: route_after_classify - READ action (no check)")
-    state1 = create_initial_state(
-        user_input="How many unassigned vehicles?",
-        session_id="test-edge-1",
-        context={"page": "busDashboard"}
-    )
-    state1.update({
-        "intent": "get_unassigned_vehicles",
-        "action_type": "read",
-        "requires_consequence_check": False,
-    })
-
-    next_node1 = route_after_classify(state1)
-    print(f"   Intent: {state1['intent']}")
-    print(f"   Requires check: {state1['requires_consequence_check']}")
-    print(f"   ✅ Next node: {next_node1}")
-
-    assert next_node1 == "execute_action", "Should route to execute_action for READ"
-
-    # Test 2: route_after_classify - Consequence check needed (DELETE)
-    print("\n✅ Test 2: route_after_classify - DELETE action (needs check)")
-    state2 = create_initial_state(
-        user_input="Remove vehicle from trip",
-        session_id="test-edge-2",
-        context={"page": "busDashboard"}
-    )
-    state2.update({
-        "intent": "remove_vehicle",
-        "action_type": "delete",
-        "requires_consequence_check": True,
-    })
-
-    next_node2 = route_after_classify(state2)
-    print(f"   Intent: {state2['intent']}")
-    print(f"   Requires check: {state2['requires_consequence_check']}")
-    print(f"   ✅ Next node: {next_node2}")
-
-    assert next_node2 == "check_consequences", "Should route to check_consequences for DELETE"
-
-    # Test 3: route_after_classify - Error occurred
-    print("\n✅ Test 3: route_after_classify - Error in classify")
-    state3 = create_initial_state(
-        user_input="Invalid action",
-        session_id="test-edge-3",
-        context={"page": "busDashboard"}
-    )
-    state3.update({
-        "error": "Failed to classify intent",
-        "error_node": "classify_intent_node",
-    })
-
-    next_node3 = route_after_classify(state3)
-    print(f"   Error: {state3['error']}")
-    print(f"   ✅ Next node: {next_node3}")
-
-    assert next_node3 == "format_response", "Should route to format_response on error"
-
-    # Test 4: route_after_consequences - Low risk (no confirmation)
-    print("\n✅ Test 4: route_after_consequences - LOW RISK")
-    state4 = create_initial_state(
-        user_input="Remove vehicle from empty trip",
-        session_id="test-edge-4",
-        context={"page": "busDashboard"}
-    )
-    state4.update({
-        "intent": "remove_vehicle",
-        "risk_level": "low",
-        "requires_confirmation": False,
-    })
-
-    next_node4 = route_after_consequences(state4)
-    print(f"   Risk level: {state4['risk_level']}")
-    print(f"   Requires confirmation: {state4['requires_confirmation']}")
-    print(f"   ✅ Next node: {next_node4}")
-
-    assert next_node4 == "execute_action", "Should route to execute_action for LOW RISK"
-
-    # Test 5: route_after_consequences - High risk (needs confirmation)
-    print("\n✅ Test 5: route_after_consequences - HIGH RISK")
-    state5 = create_initial_state(
-        user_input="Remove vehicle from Bulk-00:01",
-        session_id="test-edge-5",
-        context={"page": "busDashboard"}
-    )
-    state5.update({
-        "intent": "remove_vehicle",
-        "risk_level": "high",
-        "requires_confirmation": True,
-        "consequences": {"affected_bookings": 15},
-    })
-
-    next_node5 = route_after_consequences(state5)
-    print(f"   Risk level: {state5['risk_level']}")
-    print(f"   Requires confirmation: {state5['requires_confirmation']}")
-    print(f"   Affected bookings: {state5['consequences']['affected_bookings']}")
-    print(f"   ✅ Next node: {next_node5}")
-
-    assert next_node5 == "request_confirmation", "Should route to request_confirmation for HIGH RISK"
-
-    # Test 6: route_after_consequences - Error occurred
-    print("\n✅ Test 6: route_after_consequences - Error in consequences")
-    state6 = create_initial_state(
-        user_input="Check consequences",
-        session_id="test-edge-6",
-        context={"page": "busDashboard"}
-    )
-    state6.update({
-        "error": "Database error while checking consequences",
-        "error_node": "check_consequences_node",
-    })
-
-    next_node6 = route_after_consequences(state6)
-    print(f"   Error: {state6['error']}")
-    print(f"   ✅ Next node: {next_node6}")
-
-    assert next_node6 == "format_response", "Should route to format_response on error"
-
-    # Test 7: route_after_confirmation - User confirmed
-    print("\n✅ Test 7: route_after_confirmation - User CONFIRMED")
-    state7 = create_initial_state(
-        user_input="Yes, proceed",
-        session_id="test-edge-7",
-        context={"page": "busDashboard"}
-    )
-    state7.update({
-        "requires_confirmation": True,
-        "user_confirmed": True,
-    })
-
-    next_node7 = route_after_confirmation(state7)
-    print(f"   User confirmed: {state7['user_confirmed']}")
-    print(f"   ✅ Next node: {next_node7}")
-
-    assert next_node7 == "execute_action", "Should route to execute_action when confirmed"
-
-    # Test 8: route_after_confirmation - User NOT confirmed (waiting)
-    print("\n✅ Test 8: route_after_confirmation - Waiting for user")
-    state8 = create_initial_state(
-        user_input="Remove vehicle",
-        session_id="test-edge-8",
-        context={"page": "busDashboard"}
-    )
-    state8.update({
-        "requires_confirmation": True,
-        "user_confirmed": False,
-        "confirmation_message": "Do you want to proceed?",
-    })
-
-    next_node8 = route_after_confirmation(state8)
-    print(f"   User confirmed: {state8['user_confirmed']}")
-    print(f"   ✅ Next node: {next_node8}")
-
-    assert next_node8 == "format_response", "Should route to format_response when waiting"
-
-    # Test 9: route_after_execute - Always goes to format_response
-    print("\n✅ Test 9: route_after_execute - SUCCESS")
-    state9 = create_initial_state(
-        user_input="Get vehicles",
-        session_id="test-edge-9",
-        context={"page": "busDashboard"}
-    )
-    state9.update({
-        "execution_success": True,
-        "tool_results": {"success": True, "data": {"count": 3}},
-    })
-
-    next_node9 = route_after_execute(state9)
-    print(f"   Execution success: {state9['execution_success']}")
-    print(f"   ✅ Next node: {next_node9}")
-
-    assert next_node9 == "format_response", "Should always route to format_response"
-
-    # Test 10: route_after_execute - FAILURE
-    print("\n✅ Test 10: route_after_execute - FAILURE")
-    state10 = create_initial_state(
-        user_input="Invalid tool",
-        session_id="test-edge-10",
-        context={"page": "busDashboard"}
-    )
-    state10.update({
-        "execution_success": False,
-        "execution_error": "Tool not found",
-    })
-
-    next_node10 = route_after_execute(state10)
-    print(f"   Execution success: {state10['execution_success']}")
-    print(f"   ✅ Next node: {next_node10}")
-
-    assert next_node10 == "format_response", "Should always route to format_response"
-
-    # Test 11: get_routing_explanation - READ path
-    print("\n✅ Test 11: get_routing_explanation - READ path")
-    state11 = create_initial_state(
-        user_input="List vehicles",
-        session_id="test-edge-11",
-        context={"page": "busDashboard"}
-    )
-    state11.update({
-        "requires_consequence_check": False,
-        "execution_success": True,
-    })
-
-    explanation11 = get_routing_explanation(state11)
-    print(f"   Routing path:")
-    print(f"   {explanation11}")
-
-    assert "execute_action" in explanation11, "Should show execute_action in path"
-
-    # Test 12: get_routing_explanation - HIGH RISK with confirmation
-    print("\n✅ Test 12: get_routing_explanation - HIGH RISK path")
-    state12 = create_initial_state(
-        user_input="Remove vehicle from Bulk-00:01",
-        session_id="test-edge-12",
-        context={"page": "busDashboard"}
-    )
-    state12.update({
-        "requires_consequence_check": True,
-        "requires_confirmation": True,
-        "user_confirmed": True,
-        "execution_success": True,
-    })
+# Every case starts from the same base state; only the fields that drive
+# routing differ, so build the base once and overlay each case on a copy
+BASE_STATE = create_initial_state(
+    user_input="",
+    session_id="test-edge",
+    context={"page": "busDashboard"},
+)
 
-    explanation12 = get_routing_explanation(state12)
-    print(f"   Routing path:")
-    print(f"   {explanation12}")
+# (title, routing function, state fields, expected next node, failure message)
+ROUTING_CASES = [
+    (
+        "route_after_classify - READ action (no check)",
+        route_after_classify,
+        {
+            "user_input": "How many unassigned vehicles?",
+            "intent": "get_unassigned_vehicles",
+            "action_type": "read",
+            "requires_consequence_check": False,
+        },
+        "execute_action",
+        "Should route to execute_action for READ",
+    ),
+    (
+        "route_after_classify - DELETE action (needs check)",
+        route_after_classify,
+        {
+            "user_input": "Remove vehicle from trip",
+            "intent": "remove_vehicle",
+            "action_type": "delete",
+            "requires_consequence_check": True,
+        },
+        "check_consequences",
+        "Should route to check_consequences for DELETE",
+    ),
+    (
+        "route_after_classify - Error in classify",
+        route_after_classify,
+        {
+            "user_input": "Invalid action",
+            "error": "Failed to classify intent",
+            "error_node": "classify_intent_node",
+        },
+        "format_response",
+        "Should route to format_response on error",
+    ),
+    (
+        "route_after_consequences - LOW RISK",
+        route_after_consequences,
+        {
+            "user_input": "Remove vehicle from empty trip",
+            "intent": "remove_vehicle",
+            "risk_level": "low",
+            "requires_confirmation": False,
+        },
+        "execute_action",
+        "Should route to execute_action for LOW RISK",
+    ),
+    (
+        "route_after_consequences - HIGH RISK",
+        route_after_consequences,
+        {
+            "user_input": "Remove vehicle from Bulk-00:01",
+            "intent": "remove_vehicle",
+            "risk_level": "high",
+            "requires_confirmation": True,
+            "consequences": {"affected_bookings": 15},
+        },
+        "request_confirmation",
+        "Should route to request_confirmation for HIGH RISK",
+    ),
+    (
+        "route_after_consequences - Error in consequences",
+        route_after_consequences,
+        {
+            "user_input": "Check consequences",
+            "error": "Database error while checking consequences",
+            "error_node": "check_consequences_node",
+        },
+        "format_response",
+        "Should route to format_response on error",
+    ),
+    (
+        "route_after_confirmation - User CONFIRMED",
+        route_after_confirmation,
+        {
+            "user_input": "Yes, proceed",
+            "requires_confirmation": True,
+            "user_confirmed": True,
+        },
+        "execute_action",
+        "Should route to execute_action when confirmed",
+    ),
+    (
+        "route_after_confirmation - Waiting for user",
+        route_after_confirmation,
+        {
+            "user_input": "Remove vehicle",
+            "requires_confirmation": True,
+            "user_confirmed": False,
+            "confirmation_message": "Do you want to proceed?",
+        },
+        "format_response",
+        "Should route to format_response when waiting",
+    ),
+    (
+        "route_after_execute - SUCCESS",
+        route_after_execute,
+        {
+            "user_input": "Get vehicles",
+            "execution_success": True,
+            "tool_results": {"success": True, "data": {"count": 3}},
+        },
+        "format_response",
+        "Should always route to format_response",
+    ),
+    (
+        "route_after_execute - FAILURE",
+        route_after_execute,
+        {
+            "user_input": "Invalid tool",
+            "execution_success": False,
+            "execution_error": "Tool not found",
+        },
+        "format_response",
+        "Should always route to format_response",
+    ),
+]
+
+# (title, state fields, node names the routing explanation must mention)
+EXPLANATION_CASES = [
+    (
+        "get_routing_explanation - READ path",
+        {
+            "user_input": "List vehicles",
+            "requires_consequence_check": False,
+            "execution_success": True,
+        },
+        ["execute_action"],
+    ),
+    (
+        "get_routing_explanation - HIGH RISK path",
+        {
+            "user_input": "Remove vehicle from Bulk-00:01",
+            "requires_consequence_check": True,
+            "requires_confirmation": True,
+            "user_confirmed": True,
+            "execution_success": True,
+        },
+        ["check_consequences", "request_confirmation"],
+    ),
+]
 
-    assert "check_consequences" in explanation12, "Should show check_consequences"
-    assert "request_confirmation" in explanation12, "Should show request_confirmation"
 
-    print("\n" + "="*60)
-    print("🎉 All Phase 5 tests PASSED!")
-    print("="*60)
-    print("\nSummary:")
-    print("- ✅ route_after_classify works for READ/WRITE/DELETE")
-    print("- ✅ route_after_classify handles errors correctly")
-    print("- ✅ route_after_consequences routes based on risk level")
-    print("- ✅ route_after_consequences handles errors correctly")
-    print("- ✅ route_after_confirmation routes on user confirmation")
-    print("- ✅ route_after_confirmation waits when not confirmed")
-    print("- ✅ route_after_execute always goes to format_response")
-    print("- ✅ get_routing_explanation generates correct paths")
-    print("\nAll conditional routing logic verified!")
+async def test_edge_routing():
+    """Test conditional routing logic for all edge functions."""
+    logger.warning("\n" + "="*60)
+    logger.warning("PHASE 5 TEST: Edge Routing Functions")
+    logger.warning("="*60)
+
+    test_number = 0
+
+    for title, route, fields, expected, message in ROUTING_CASES:
+        test_number += 1
+        logger.info(f"\n✅ Test {test_number}: {title}")
+        state = {**BASE_STATE, **fields}
+
+        next_node = route(state)
+        for key, value in fields.items():
+            if key != "user_input":
+                logger.info(f"   {key}: {value}")
+        logger.info(f"   ✅ Next node: {next_node}")
+
+        assert next_node == expected, message
+
+    for title, fields, expected_nodes in EXPLANATION_CASES:
+        test_number += 1
+        logger.info(f"\n✅ Test {test_number}: {title}")
+        state = {**BASE_STATE, **fields}
+
+        explanation = get_routing_explanation(state)
+        logger.info(f"   Routing path:")
+        logger.info(f"   {explanation}")
+
+        for node in expected_nodes:
+            assert node in explanation, f"Should show {node} in path"
+
+    logger.warning("\n" + "="*60)
+    logger.warning("🎉 All Phase 5 tests PASSED!")
+    logger.warning("="*60)
+    logger.warning("\nSummary:")
+    logger.warning("- ✅ route_after_classify works for READ/WRITE/DELETE")
+    logger.warning("- ✅ route_after_classify handles errors correctly")
+    logger.warning("- ✅ route_after_consequences routes based on risk level")
+    logger.warning("- ✅ route_after_consequences handles errors correctly")
+    logger.warning("- ✅ route_after_confirmation routes on user confirmation")
+    logger.warning("- ✅ route_after_confirmation waits when not confirmed")
+    logger.warning("- ✅ route_after_execute always goes to format_response")
+    logger.warning("- ✅ get_routing_explanation generates correct paths")
+    logger.warning("\nAll conditional routing logic verified!")
 
     return True
 
@@ -273,12 +234,17 @@ async def main():
         success = await test_edge_routing()
         return 0 if success else 1
     except Exception as e:
-        print(f"\n❌ Phase 5 test FAILED: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"\n❌ Phase 5 test FAILED: {e}")
         return 1
 
 
 if __name__ == "__main__":
-    exit_code = asyncio.run(main())
+    # uvloop ships with uvicorn[standard] on Linux/macOS; fall back elsewhere
+    try:
+        import uvloop
+        run = uvloop.run
+    except ImportError:
+        run = asyncio.run
+
+    exit_code = run(main())
     exit(exit_code)
@@ -9,8 +9,11 @@ Tests:
 """
 import asyncio
 import sys
+from collections import Counter
 from pathlib import Path
 
+from pydantic import TypeAdapter, ValidationError
+
 # Add backend to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
@@ -29,6 +32,47 @@ from app.tools import get_trip_status, get_consequences_for_action
 from app.core.database import AsyncSessionLocal
 
 
+# One adapter per request schema, built once and reused by every case below
+_REQUEST_ADAPTERS = {
+    "get_trip_status": TypeAdapter(GetTripStatusRequest),
+    "assign_vehicle_to_trip": TypeAdapter(AssignVehicleToTripRequest),
+    "create_stop": TypeAdapter(CreateStopRequest),
+    "remove_vehicle_from_trip": TypeAdapter(RemoveVehicleFromTripRequest),
+    "get_consequences_for_action": TypeAdapter(GetConsequencesRequest),
+}
+
+# (title, tool name, payload, should the payload validate)
+REQUEST_CASES = [
+    ("Testing GetTripStatusRequest", "get_trip_status", {"trip_id": 1}, True),
+    ("Testing validation (trip_id must be > 0)", "get_trip_status", {"trip_id": 0}, False),
+    (
+        "Testing AssignVehicleToTripRequest",
+        "assign_vehicle_to_trip",
+        {"trip_id": 1, "vehicle_id": 2, "driver_id": 3},
+        True,
+    ),
+    (
+        "Testing CreateStopRequest",
+        "create_stop",
+        {"name": "Test Stop", "latitude": 12.9352, "longitude": 77.6245},
+        True,
+    ),
+    (
+        "Testing coordinate validation (latitude must be -90 to 90)",
+        "create_stop",
+        {"name": "Test", "latitude": 100.0, "longitude": 77.0},
+        False,
+    ),
+    ("Testing RemoveVehicleFromTripRequest", "remove_vehicle_from_trip", {"trip_id": 1}, True),
+    (
+        "Testing GetConsequencesRequest",
+        "get_consequences_for_action",
+        {"action_type": "remove_vehicle", "entity_id": 1},
+        True,
+    ),
+]
+
+
 def print_section(title: str):
     """Print a formatted section header."""
     print("\n" + "=" * 80)
@@ -40,115 +84,63 @@ async def test_request_schemas():
     """Test all request schemas."""
     print_section("Test 1: Tool Request Schemas")
 
-    # Test 1: GetTripStatusRequest
-    print("\n1. Testing GetTripStatusRequest...")
-    try:
-        request = GetTripStatusRequest(trip_id=1)
-        print(f"   ✅ Valid: {request.model_dump()}")
-    except Exception as e:
-        print(f"   ❌ Failed: {e}")
-
-    # Test 2: Invalid trip_id (must be > 0)
-    print("\n2. Testing validation (trip_id must be > 0)...")
-    try:
-        request = GetTripStatusRequest(trip_id=0)
-        print(f"   ❌ Should have failed but got: {request.model_dump()}")
-    except Exception as e:
-        print(f"   ✅ Correctly caught error: {str(e)[:80]}")
-
-    # Test 3: AssignVehicleToTripRequest
-    print("\n3. Testing AssignVehicleToTripRequest...")
-    try:
-        request = AssignVehicleToTripRequest(trip_id=1, vehicle_id=2, driver_id=3)
-        print(f"   ✅ Valid: {request.model_dump()}")
-    except Exception as e:
-        print(f"   ❌ Failed: {e}")
-
-    # Test 4: CreateStopRequest with coordinates
-    print("\n4. Testing CreateStopRequest...")
-    try:
-        request = CreateStopRequest(name="Test Stop", latitude=12.9352, longitude=77.6245)
-        print(f"   ✅ Valid: {request.model_dump()}")
-    except Exception as e:
-        print(f"   ❌ Failed: {e}")
-
-    # Test 5: Invalid latitude (must be -90 to 90)
-    print("\n5. Testing coordinate validation...")
-    try:
-        request = CreateStopRequest(name="Test", latitude=100.0, longitude=77.0)
-        print(f"   ❌ Should have failed but got: {request.model_dump()}")
-    except Exception as e:
-        print(f"   ✅ Correctly caught error: Latitude out of range")
+    for number, (title, tool_name, payload, should_pass) in enumerate(REQUEST_CASES, 1):
+        print(f"\n{number}. {title}...")
+        try:
+            request = _REQUEST_ADAPTERS[tool_name].validate_python(payload)
+        except ValidationError as e:
+            if should_pass:
+                print(f"   ❌ Failed: {e}")
+            else:
+                print(f"   ✅ Correctly caught error: {str(e)[:80]}")
+        else:
+            if should_pass:
+                print(f"   ✅ Valid: {request.model_dump()}")
+            else:
+                print(f"   ❌ Should have failed but got: {request.model_dump()}")
+
+
+async def test_response_schema(result):
+    """Test response schema with actual tool output (from get_trip_status)."""
+    print_section("Test 2: Tool Response Schema with Real Data")
 
-    # Test 6: RemoveVehicleFromTripRequest
-    print("\n6. Testing RemoveVehicleFromTripRequest...")
-    try:
-        request = RemoveVehicleFromTripRequest(trip_id=1)
-        print(f"   ✅ Valid: {request.model_dump()}")
-    except Exception as e:
-        print(f"   ❌ Failed: {e}")
+    print("\n1. Result of get_trip_status(trip_id=1)...")
+    print(f"   Tool returned: {result.keys()}")
 
-    # Test 7: GetConsequencesRequest
-    print("\n7. Testing GetConsequencesRequest...")
+    # Validate with schema
+    print("\n2. Validating with ToolResponse schema...")
     try:
-        request = GetConsequencesRequest(action_type="remove_vehicle", entity_id=1)
-        print(f"   ✅ Valid: {request.model_dump()}")
+        response = ToolResponse(**result)
+        print(f"   ✅ Schema validation passed")
+        print(f"   Success: {response.success}")
+        print(f"   Message: {response.message}")
+        print(f"   Data keys: {list(response.data.keys()) if response.data else None}")
     except Exception as e:
-        print(f"   ❌ Failed: {e}")
+        print(f"   ❌ Schema validation failed: {e}")
 
 
-async def test_response_schema():
-    """Test response schema with actual tool output."""
-    print_section("Test 2: Tool Response Schema with Real Data")
+async def test_consequence_schema(result):
+    """Test consequence result schema (from get_consequences_for_action)."""
+    print_section("Test 3: Consequence Result Schema")
 
-    async with AsyncSessionLocal() as session:
-        # Call a real tool
-        print("\n1. Calling get_trip_status(trip_id=1)...")
-        result = await get_trip_status(trip_id=1, db=session)
-        print(f"   Tool returned: {result.keys()}")
+    print("\n1. Consequences for Bulk - 00:01 trip (25% booked)...")
+    print(f"   Tool returned: success={result['success']}")
 
-        # Validate with schema
-        print("\n2. Validating with ToolResponse schema...")
+    # Validate consequence data
+    if result['success'] and result['data']:
+        print("\n2. Validating ConsequenceResult schema...")
         try:
-            response = ToolResponse(**result)
+            consequence = ConsequenceResult(**result['data'])
             print(f"   ✅ Schema validation passed")
-            print(f"   Success: {response.success}")
-            print(f"   Message: {response.message}")
-            print(f"   Data keys: {list(response.data.keys()) if response.data else None}")
+            print(f"   Risk Level: {consequence.risk_level}")
+            print(f"   Action Type: {consequence.action_type}")
+            print(f"   Proceed with Caution: {consequence.proceed_with_caution}")
+            print(f"   Affected Bookings: {consequence.affected_bookings}")
+            print(f"   Explanation: {consequence.explanation[:100]}...")
         except Exception as e:
             print(f"   ❌ Schema validation failed: {e}")
 
 
-async def test_consequence_schema():
-    """Test consequence result schema."""
-    print_section("Test 3: Consequence Result Schema")
-
-    async with AsyncSessionLocal() as session:
-        # Call consequence checker for high-risk trip
-        print("\n1. Checking consequences for Bulk - 00:01 trip (25% booked)...")
-        result = await get_consequences_for_action(
-            action_type="remove_vehicle",
-            entity_id=1,  # Bulk - 00:01 trip
-            db=session
-        )
-
-        print(f"   Tool returned: success={result['success']}")
-
-        # Validate consequence data
-        if result['success'] and result['data']:
-            print("\n2. Validating ConsequenceResult schema...")
-            try:
-                consequence = ConsequenceResult(**result['data'])
-                print(f"   ✅ Schema validation passed")
-                print(f"   Risk Level: {consequence.risk_level}")
-                print(f"   Action Type: {consequence.action_type}")
-                print(f"   Proceed with Caution: {consequence.proceed_with_caution}")
-                print(f"   Affected Bookings: {consequence.affected_bookings}")
-                print(f"   Explanation: {consequence.explanation[:100]}...")
-            except Exception as e:
-                print(f"   ❌ Schema validation failed: {e}")
-
-
 async def test_validation_utility():
     """Test the validate_tool_request utility."""
     print_section("Test 4: Validation Utility")
@@ -210,9 +202,7 @@ async def test_metadata_registry():
 
     # Count by category
     print("\n3. Tools by category...")
-    categories = {}
-    for name, meta in TOOL_METADATA_REGISTRY.items():
-        categories[meta.category] = categories.get(meta.category, 0) + 1
+    categories = Counter(meta.category for meta in TOOL_METADATA_REGISTRY.values())
     for category, count in categories.items():
         print(f"   {category}: {count} tools")
 
@@ -233,8 +223,22 @@ async def main():
 
     try:
         await test_request_schemas()
-        await test_response_schema()
-        await test_consequence_schema()
+
+        # The two tool calls behind Tests 2 and 3 are independent reads, so
+        # run them concurrently (an AsyncSession can't be shared between
+        # concurrent calls, so each gets its own) and validate afterwards
+        async with AsyncSessionLocal() as trip_session, AsyncSessionLocal() as consequence_session:
+            trip_status, consequences = await asyncio.gather(
+                get_trip_status(trip_id=1, db=trip_session),
+                get_consequences_for_action(
+                    action_type="remove_vehicle",
+                    entity_id=1,  # Bulk - 00:01 trip
+                    db=consequence_session
+                ),
+            )
+        await test_response_schema(trip_status)
+        await test_consequence_schema(consequences)
+
         await test_validation_utility()
         await test_metadata_registry()
 
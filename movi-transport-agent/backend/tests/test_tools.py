@@ -7,17 +7,21 @@ This script tests:
 3. 1 Delete tool (remove_vehicle_from_trip)
 4. 1 Consequence tool (get_consequences_for_action)
 
-Tests use the existing SQLite database with seed data.
+Tests use the existing SQLite database with seed data; everything the tests
+write is rolled back at the end, so the database is left unchanged.
 """
 import asyncio
 import sys
+from contextvars import ContextVar
 from pathlib import Path
+from typing import List, Optional
 
 # Add backend to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.database import AsyncSessionLocal
+from app.core.database import AsyncSessionLocal, engine
 from app.tools import (
     # Read tools
     get_unassigned_vehicles_count,
@@ -42,11 +46,40 @@ from app.tools import (
 )
 
 
+# Output lines of the test group running in the current task (None when the
+# group runs on its own). Groups run concurrently; buffering keeps each
+# group's output in one block.
+_group_output: ContextVar[Optional[List[str]]] = ContextVar("_group_output", default=None)
+
+
+def log(text: str = ""):
+    """Print a line, or buffer it while a concurrent test group is running."""
+    output = _group_output.get()
+    if output is None:
+        print(text)
+    else:
+        output.append(text)
+
+
+# The write tests run in a transaction that is rolled back at the end (see
+# main()). sqlite3 normally defers BEGIN to the first write and commits on
+# RELEASE SAVEPOINT, which would let the tools' commits through; take over
+# transaction control so BEGIN and savepoints behave as SQLAlchemy expects.
+@event.listens_for(engine.sync_engine, "connect")
+def _disable_driver_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(engine.sync_engine, "begin")
+def _emit_begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+
 def print_section(title: str):
     """Print a formatted section header."""
-    print("\n" + "=" * 80)
-    print(f"  {title}")
-    print("=" * 80)
+    log("\n" + "=" * 80)
+    log(f"  {title}")
+    log("=" * 80)
 
 
 def print_result(test_name: str, result: dict, expected_success: bool = True):
@@ -54,40 +87,52 @@ def print_result(test_name: str, result: dict, expected_success: bool = True):
     success = result.get("success", False)
     status = "✅ PASS" if success == expected_success else "❌ FAIL"
 
-    print(f"\n{status} | {test_name}")
-    print(f"  Success: {result.get('success')}")
-    print(f"  Message: {result.get('message')}")
+    log(f"\n{status} | {test_name}")
+    log(f"  Success: {result.get('success')}")
+    log(f"  Message: {result.get('message')}")
 
     if result.get("data"):
-        print(f"  Data: {result.get('data')}")
+        log(f"  Data: {result.get('data')}")
 
     if result.get("error"):
-        print(f"  Error: {result.get('error')}")
+        log(f"  Error: {result.get('error')}")
+
 
+async def _on_own_session(tool, **kwargs):
+    """Call a tool on a session of its own, so it can run alongside others."""
+    async with AsyncSessionLocal() as db:
+        return await tool(db=db, **kwargs)
 
-async def test_read_tools(db: AsyncSession):
+
+async def test_read_tools():
     """Test all 4 read operations."""
     print_section("Testing Read Tools (4)")
 
+    # The four reads are independent, so issue them together (each on its
+    # own session; an AsyncSession can't be shared between concurrent calls)
+    # and report the results in order
+    unassigned, trip_status, path_stops, path_routes = await asyncio.gather(
+        _on_own_session(get_unassigned_vehicles_count),
+        _on_own_session(get_trip_status, trip_id=1),
+        _on_own_session(list_stops_for_path, path_name=1),
+        _on_own_session(list_routes_by_path, path_name=2),
+    )
+
     # Test 1: Get unassigned vehicles count
-    print("\n1. Testing get_unassigned_vehicles_count()")
-    result = await get_unassigned_vehicles_count(db)
-    print_result("Get Unassigned Vehicles Count", result)
+    log("\n1. Testing get_unassigned_vehicles_count()")
+    print_result("Get Unassigned Vehicles Count", unassigned)
 
     # Test 2: Get trip status (trip_id=1 is "Bulk - 00:01" with 25% booking)
-    print("\n2. Testing get_trip_status(trip_id=1)")
-    result = await get_trip_status(trip_id=1, db=db)
-    print_result("Get Trip Status (Bulk - 00:01)", result)
+    log("\n2. Testing get_trip_status(trip_id=1)")
+    print_result("Get Trip Status (Bulk - 00:01)", trip_status)
 
     # Test 3: List stops for path (path_id=1 is "Path-1")
-    print("\n3. Testing list_stops_for_path(path_name=1)")
-    result = await list_stops_for_path(path_name=1, db=db)
-    print_result("List Stops for Path-1", result)
+    log("\n3. Testing list_stops_for_path(path_name=1)")
+    print_result("List Stops for Path-1", path_stops)
 
     # Test 4: List routes by path (path_id=2 is "Path-2")
-    print("\n4. Testing list_routes_by_path(path_name=2)")
-    result = await list_routes_by_path(path_name=2, db=db)
-    print_result("List Routes by Path-2", result)
+    log("\n4. Testing list_routes_by_path(path_name=2)")
+    print_result("List Routes by Path-2", path_routes)
 
 
 async def test_consequence_tool(db: AsyncSession):
@@ -95,30 +140,30 @@ async def test_consequence_tool(db: AsyncSession):
     print_section("Testing Consequence Tool (Tribal Knowledge)")
 
     # Test 1: Check consequences for removing vehicle from trip with bookings (HIGH RISK)
-    print("\n1. Testing get_consequences_for_action('remove_vehicle', trip_id=1)")
-    print("   (Trip 'Bulk - 00:01' has 25% bookings - should be HIGH RISK)")
+    log("\n1. Testing get_consequences_for_action('remove_vehicle', trip_id=1)")
+    log("   (Trip 'Bulk - 00:01' has 25% bookings - should be HIGH RISK)")
     result = await get_consequences_for_action(
         action_type="remove_vehicle",
         entity_id=1,
         db=db
     )
     print_result("Consequence Check: Remove Vehicle (HIGH RISK)", result)
-    print(f"  Risk Level: {result.get('data', {}).get('risk_level')}")
-    print(f"  Explanation:\n    {result.get('data', {}).get('explanation')}")
+    log(f"  Risk Level: {result.get('data', {}).get('risk_level')}")
+    log(f"  Explanation:\n    {result.get('data', {}).get('explanation')}")
 
     # Test 2: Check consequences for trip without bookings (should be LOW/NONE)
-    print("\n2. Testing get_consequences_for_action('remove_vehicle', trip_id=3)")
-    print("   (Trip without high bookings - should be LOW/NONE)")
+    log("\n2. Testing get_consequences_for_action('remove_vehicle', trip_id=3)")
+    log("   (Trip without high bookings - should be LOW/NONE)")
     result = await get_consequences_for_action(
         action_type="remove_vehicle",
         entity_id=3,
         db=db
     )
     print_result("Consequence Check: Remove Vehicle (LOW/NONE)", result)
-    print(f"  Risk Level: {result.get('data', {}).get('risk_level')}")
+    log(f"  Risk Level: {result.get('data', {}).get('risk_level')}")
 
     # Test 3: Check consequences for unknown action type (should be NONE)
-    print("\n3. Testing get_consequences_for_action('unknown_action', entity_id=1)")
+    log("\n3. Testing get_consequences_for_action('unknown_action', entity_id=1)")
     result = await get_consequences_for_action(
         action_type="unknown_action",
         entity_id=1,
@@ -132,7 +177,7 @@ async def test_create_tools(db: AsyncSession):
     print_section("Testing Create Tools (4)")
 
     # Test 1: Create a new stop (using timestamp to ensure uniqueness)
-    print("\n1. Testing create_stop()")
+    log("\n1. Testing create_stop()")
     from datetime import datetime
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     result = await create_stop(
@@ -144,7 +189,7 @@ async def test_create_tools(db: AsyncSession):
     print_result("Create Stop", result)
 
     # Test 2: Create a new path (using existing stop IDs)
-    print("\n2. Testing create_path()")
+    log("\n2. Testing create_path()")
     result = await create_path(
         path_name=f"Test Path - Express {timestamp}",
         ordered_stop_ids=[1, 2, 3],  # Using existing stops
@@ -154,7 +199,7 @@ async def test_create_tools(db: AsyncSession):
     created_path_name = result.get("data", {}).get("path_name")
 
     # Test 3: Create a new route (using the path we just created)
-    print("\n3. Testing create_route()")
+    log("\n3. Testing create_route()")
     if created_path_name:
         result = await create_route(
             path_name=created_path_name,
@@ -166,11 +211,11 @@ async def test_create_tools(db: AsyncSession):
         )
         print_result("Create Route", result)
     else:
-        print("❌ SKIP | Create Route (path creation failed)")
+        log("❌ SKIP | Create Route (path creation failed)")
 
     # Test 4: Assign vehicle to trip (vehicle_id=4, driver_id=3, trip_id=5)
-    print("\n4. Testing assign_vehicle_to_trip()")
-    print("   (Assigning vehicle 4, driver 3 to trip 5)")
+    log("\n4. Testing assign_vehicle_to_trip()")
+    log("   (Assigning vehicle 4, driver 3 to trip 5)")
     result = await assign_vehicle_to_trip(
         trip_id=5,
         vehicle_id=4,
@@ -185,17 +230,17 @@ async def test_delete_tool(db: AsyncSession):
     print_section("Testing Delete Tool (1)")
 
     # Test: Remove vehicle from trip (trip_id=5 which we just assigned to)
-    print("\n1. Testing remove_vehicle_from_trip(trip_id=5)")
-    print("   (Removing vehicle we just assigned in previous test)")
+    log("\n1. Testing remove_vehicle_from_trip(trip_id=5)")
+    log("   (Removing vehicle we just assigned in previous test)")
     result = await remove_vehicle_from_trip(trip_id=5, db=db)
     print_result("Remove Vehicle from Trip", result)
 
 
-async def test_tool_registry():
+async def test_tool_registry(db: AsyncSession):
     """Test the TOOL_REGISTRY dispatch mechanism."""
     print_section("Testing TOOL_REGISTRY Dispatch Mechanism")
 
-    print("\n1. Verifying all 10 tools are registered")
+    log("\n1. Verifying all 10 tools are registered")
     expected_tools = [
         "get_unassigned_vehicles_count",
         "get_trip_status",
@@ -210,22 +255,20 @@ async def test_tool_registry():
     ]
 
     registered_tools = set(TOOL_REGISTRY.keys())
-    print(f"  Total registered tools: {len(registered_tools)}")
-    print(f"  Registered tool names: {sorted(registered_tools)}")
+    log(f"  Total registered tools: {len(registered_tools)}")
+    log(f"  Registered tool names: {sorted(registered_tools)}")
 
     all_present = all(tool in registered_tools for tool in expected_tools)
     if all_present:
-        print("  ✅ All 10 core tools are registered")
+        log("  ✅ All 10 core tools are registered")
     else:
-        print("  ❌ Some core tools missing from registry")
+        log("  ❌ Some core tools missing from registry")
 
     # Test dispatch mechanism
-    print("\n2. Testing TOOL_REGISTRY dispatch")
-    async with AsyncSessionLocal() as db:
-        # Dispatch via registry
-        tool_func = TOOL_REGISTRY["get_unassigned_vehicles_count"]
-        result = await tool_func(db=db)
-        print_result("Registry Dispatch Test", result)
+    log("\n2. Testing TOOL_REGISTRY dispatch")
+    tool_func = TOOL_REGISTRY["get_unassigned_vehicles_count"]
+    result = await tool_func(db=db)
+    print_result("Registry Dispatch Test", result)
 
 
 async def test_error_handling(db: AsyncSession):
@@ -233,12 +276,12 @@ async def test_error_handling(db: AsyncSession):
     print_section("Testing Error Handling")
 
     # Test 1: Get status for non-existent trip
-    print("\n1. Testing get_trip_status(trip_id=9999) [Should fail]")
+    log("\n1. Testing get_trip_status(trip_id=9999) [Should fail]")
     result = await get_trip_status(trip_id=9999, db=db)
     print_result("Get Non-Existent Trip", result, expected_success=False)
 
     # Test 2: Assign non-existent vehicle
-    print("\n2. Testing assign_vehicle_to_trip(vehicle_id=9999) [Should fail]")
+    log("\n2. Testing assign_vehicle_to_trip(vehicle_id=9999) [Should fail]")
     result = await assign_vehicle_to_trip(
         trip_id=1,
         vehicle_id=9999,
@@ -248,11 +291,22 @@ async def test_error_handling(db: AsyncSession):
     print_result("Assign Non-Existent Vehicle", result, expected_success=False)
 
     # Test 3: Remove vehicle from trip without deployment
-    print("\n3. Testing remove_vehicle_from_trip(trip_id=7) [Should fail - no vehicle assigned]")
+    log("\n3. Testing remove_vehicle_from_trip(trip_id=7) [Should fail - no vehicle assigned]")
     result = await remove_vehicle_from_trip(trip_id=7, db=db)
     print_result("Remove Non-Existent Deployment", result, expected_success=False)
 
 
+async def _run_concurrent_group(test_func, *args):
+    """Run one test group and write its output in one go."""
+    output = []
+    _group_output.set(output)  # Local to this task; gather runs each group in its own
+    try:
+        await test_func(*args)
+    finally:
+        sys.stdout.write("\n".join(output) + "\n")
+        sys.stdout.flush()
+
+
 async def main():
     """Run all tool tests."""
     print("\n" + "=" * 80)
@@ -260,30 +314,47 @@ async def main():
     print("  Testing all 10 required tool functions")
     print("=" * 80)
 
-    async with AsyncSessionLocal() as db:
-        try:
-            # Test each category
-            await test_read_tools(db)
-            await test_consequence_tool(db)
-            await test_create_tools(db)
-            await test_delete_tool(db)
-            await test_error_handling(db)
-
-            # Test registry (needs its own session)
-            await test_tool_registry()
-
-            print("\n" + "=" * 80)
-            print("  Test Suite Complete!")
-            print("=" * 80)
-            print("\n✅ All tool functions have been tested")
-            print("✅ Consequence checking (Tribal Knowledge) verified")
-            print("✅ TOOL_REGISTRY dispatch mechanism verified")
-            print("✅ Error handling validated")
-
-        except Exception as e:
-            print(f"\n❌ Test suite failed with error: {e}")
-            import traceback
-            traceback.print_exc()
+    try:
+        # The read and consequence tests only read, so they run concurrently,
+        # each on its own session(s) (an AsyncSession can't be shared between
+        # concurrent calls)
+        async with AsyncSessionLocal() as consequence_db:
+            await asyncio.gather(
+                _run_concurrent_group(test_read_tools),
+                _run_concurrent_group(test_consequence_tool, consequence_db),
+            )
+
+        # The rest write: the delete test removes the vehicle the create test
+        # assigns, and the error probes can remove trip 7's deployment if the
+        # seed data has one. Run them in order on one session (and one pooled
+        # connection) after the reads, inside a transaction that is rolled
+        # back at the end: the tools' own commits only release savepoints, so
+        # nothing the suite writes reaches the database file
+        async with engine.connect() as conn:
+            transaction = await conn.begin()
+            try:
+                async with AsyncSessionLocal(
+                    bind=conn, join_transaction_mode="create_savepoint"
+                ) as db:
+                    await test_create_tools(db)
+                    await test_delete_tool(db)
+                    await test_error_handling(db)
+                    await test_tool_registry(db)
+            finally:
+                await transaction.rollback()
+
+        print("\n" + "=" * 80)
+        print("  Test Suite Complete!")
+        print("=" * 80)
+        print("\n✅ All tool functions have been tested")
+        print("✅ Consequence checking (Tribal Knowledge) verified")
+        print("✅ TOOL_REGISTRY dispatch mechanism verified")
+        print("✅ Error handling validated")
+
+    except Exception as e:
+        print(f"\n❌ Test suite failed with error: {e}")
+        import traceback
+        traceback.print_exc()
 
 
 if __name__ == "__main__":
@@ -4,16 +4,96 @@ Supports text, voice, image, and video input with TTS output.
 """
 
 import gradio as gr
+import hashlib
 import uuid
 import tempfile
 import os
 import sys
-from typing import List, Tuple, Optional, Dict, Any
+import threading
+from collections import OrderedDict
+from typing import Iterator, List, Tuple, Optional, Dict, Any
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils import send_message_to_agent, send_confirmation, generate_tts
 
+# TTS audio files by response text, least recently used first. Agent replies
+# repeat a lot ("Action completed.", confirmations, errors), so a repeated
+# reply reuses its MP3 instead of calling TTS and writing a new file.
+_tts_cache: "OrderedDict[str, str]" = OrderedDict()
+_TTS_MAX = 128
+# Handlers run concurrently in Gradio's worker threads; this guards the cache
+# and the renames/unlinks of the files it owns
+_tts_lock = threading.Lock()
+
+
+def _get_tts_path(text: str) -> Optional[str]:
+    """
+    Get the path of an MP3 speaking the given text, generating it if needed.
+
+    Returns:
+        Path to the audio file, or None if TTS failed
+    """
+    key = hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+    with _tts_lock:
+        path = _tts_cache.get(key)
+        if path and os.path.exists(path):
+            _tts_cache.move_to_end(key)
+            return path
+
+    audio_bytes, tts_error = generate_tts(text)
+    if not audio_bytes or tts_error:
+        return None
+
+    # Write to a private temp file, then rename it into place, so a file
+    # that is already being served is never truncated or half-written
+    fd, tmp_path = tempfile.mkstemp(suffix=".mp3.tmp", prefix="movi_tts_")
+    with os.fdopen(fd, "wb") as f:
+        f.write(audio_bytes)
+
+    path = os.path.join(tempfile.gettempdir(), f"movi_tts_{key}.mp3")
+    with _tts_lock:
+        os.replace(tmp_path, path)
+        _tts_cache[key] = path
+        _tts_cache.move_to_end(key)
+
+        if len(_tts_cache) > _TTS_MAX:
+            _, evicted = _tts_cache.popitem(last=False)
+            try:
+                os.unlink(evicted)
+            except OSError:
+                pass
+
+    return path
+
+
+# Warning shown in the chat (and above the Yes/No buttons) before a
+# high-risk action
+CONFIRMATION_TEMPLATE = """
+{risk_emoji} **WARNING: High-Risk Action Detected**
+
+---
+
+{confirmation_msg}
+
+**Consequences:**
+{consequences}
+
+---
+
+**⚡ Do you want to proceed?**
+            """
+DEFAULT_CONSEQUENCES = "• This action may have significant consequences"
+
+UPLOAD_HELP = """
+💡 **How to use:**
+1. Upload an image (e.g., screenshot of dashboard)
+2. Type your question in the text box above
+3. Click **Send** → Both image and text will be sent together!
+4. The upload will clear automatically after sending
+"""
+
 
 def create_chat_interface(page_name: str) -> dict:
     """
@@ -29,7 +109,6 @@ def create_chat_interface(page_name: str) -> dict:
     # Session state
     session_id_state = gr.State(lambda: str(uuid.uuid4()))
     pending_confirmation_state = gr.State(None)  # Stores pending confirmation data
-    tts_enabled_state = gr.State(True)  # TTS enabled by default
 
     with gr.Column() as chat_col:
         gr.Markdown("### 💬 Movi Assistant")
@@ -41,7 +120,7 @@ def create_chat_interface(page_name: str) -> dict:
             height=400,
             bubble_full_width=False,
             avatar_images=(None, "🤖"),
-            type="tuples"  # Using tuples format for compatibility
+            type="messages"  # Role/content dicts; turns are appended in place
         )
 
         # Text input row
@@ -56,13 +135,7 @@ def create_chat_interface(page_name: str) -> dict:
 
         # Multimodal inputs (collapsible) - NOW OPEN BY DEFAULT
         with gr.Accordion("📎 Upload Image/Audio/Video (optional)", open=True):
-            gr.Markdown("""
-💡 **How to use:**
-1. Upload an image (e.g., screenshot of dashboard)
-2. Type your question in the text box above
-3. Click **Send** → Both image and text will be sent together!
-4. The upload will clear automatically after sending
-""")
+            gr.Markdown(UPLOAD_HELP)
 
             with gr.Row():
                 image_input = gr.Image(
@@ -114,18 +187,21 @@ def create_chat_interface(page_name: str) -> dict:
     # Handler functions
     def handle_message(
         user_input: str,
-        history: List[Tuple[str, str]],
+        history: List[Dict[str, str]],
         session_id: str,
         audio: Optional[str],
         image: Optional[str],
         video: Optional[str],
         tts_on: bool,
         pending_confirmation: Optional[Dict]
-    ) -> Tuple[List[Tuple[str, str]], str, Optional[str], Dict, Dict, Optional[str], None, None, None]:
+    ) -> Iterator[Tuple[List[Dict[str, str]], str, Optional[str], Dict, Dict, Optional[str], None, None, None]]:
         """
         Handle user message and get agent response.
 
-        Returns:
+        A normal reply is yielded as soon as the agent answers; if TTS is on,
+        its audio follows in a second update, so the text doesn't wait on TTS.
+
+        Yields:
             Tuple of (updated_history, cleared_input, audio_output, confirmation_message,
                      pending_confirmation, confirmation_row, cleared_image, cleared_audio, cleared_video)
         """
@@ -144,24 +220,31 @@ def create_chat_interface(page_name: str) -> dict:
         # Don't process empty messages
         if not user_input.strip() and not audio and not image and not video:
             print("⚠️  Empty message - skipping")
-            return history, "", None, gr.update(), None, gr.update(visible=False), None, None, None
+            yield history, "", None, gr.update(), None, gr.update(visible=False), None, None, None
+            return
 
         # Check if user is responding to pending confirmation with text
         if pending_confirmation and user_input.strip().lower() in ['yes', 'y', 'confirm', 'proceed']:
             # Add user's confirmation to history
-            history = history + [[user_input, None]]
+            history.append({"role": "user", "content": user_input})
             # Treat as confirmation YES
-            hist, conf_row, pend, audio, conf_msg = handle_confirmation_yes(history, pending_confirmation, tts_on)
-            return (hist, "", audio, gr.update(), pend, conf_row, None, None, None)
+            updates = handle_confirmation_yes(history, pending_confirmation, tts_on)
+            hist, conf_row, pend, audio, _ = next(updates)
+            yield (hist, "", audio, gr.update(), pend, conf_row, None, None, None)
+            # Any TTS audio follows; leave anything typed since untouched
+            for hist, conf_row, pend, audio, _ in updates:
+                yield (hist, gr.update(), audio, gr.update(), pend, conf_row, gr.update(), gr.update(), gr.update())
+            return
         elif pending_confirmation and user_input.strip().lower() in ['no', 'n', 'cancel', 'abort']:
             # Add user's cancellation to history
-            history = history + [[user_input, None]]
+            history.append({"role": "user", "content": user_input})
             # Treat as confirmation NO
             hist, conf_row, pend = handle_confirmation_no(history, pending_confirmation)
-            return (hist, "", None, gr.update(), pend, conf_row, None, None, None)
+            yield (hist, "", None, gr.update(), pend, conf_row, None, None, None)
+            return
 
         # Add user message to history
-        history = history + [[user_input, None]]
+        history.append({"role": "user", "content": user_input})
 
         print("📤 Calling send_message_to_agent()...")
         # Send to backend
@@ -177,8 +260,9 @@ def create_chat_interface(page_name: str) -> dict:
 
         if error:
             # Show error in chat
-            history[-1][1] = f"❌ Error: {error}"
-            return history, "", None, "", None, gr.update(visible=False), None, None, None
+            history.append({"role": "assistant", "content": f"❌ Error: {error}"})
+            yield history, "", None, "", None, gr.update(visible=False), None, None, None
+            return
 
         # Check if confirmation is required
         if response.get("requires_confirmation", False):
@@ -205,20 +289,11 @@ def create_chat_interface(page_name: str) -> dict:
 
             # Format confirmation message with enhanced warning styling
             risk_emoji = "🚨" if risk_level == "high" else "⚠️"
-            formatted_msg = f"""
-{risk_emoji} **WARNING: High-Risk Action Detected**
-
----
-
-{confirmation_msg}
-
-**Consequences:**
-{consequence_bullets if consequence_bullets else "• This action may have significant consequences"}
-
----
-
-**⚡ Do you want to proceed?**
-            """
+            formatted_msg = CONFIRMATION_TEMPLATE.format(
+                risk_emoji=risk_emoji,
+                confirmation_msg=confirmation_msg,
+                consequences=consequence_bullets or DEFAULT_CONSEQUENCES,
+            )
 
             # Store pending confirmation data
             pending_data = {
@@ -228,9 +303,9 @@ def create_chat_interface(page_name: str) -> dict:
             }
 
             # Show confirmation warning in chat
-            history[-1][1] = formatted_msg
+            history.append({"role": "assistant", "content": formatted_msg})
 
-            return (
+            yield (
                 history,
                 "",  # Clear text input
                 None,  # No TTS audio
@@ -241,6 +316,7 @@ def create_chat_interface(page_name: str) -> dict:
                 None,  # Clear audio
                 None   # Clear video
             )
+            return
 
         # Check for errors and provide the best error message
         if response.get("error") and not response.get("execution_success", True):
@@ -258,22 +334,13 @@ def create_chat_interface(page_name: str) -> dict:
             # Use the actual response from the backend
             agent_response = response.get("response", "I'm sorry, I couldn't process that request.")
 
-        history[-1][1] = agent_response
+        history.append({"role": "assistant", "content": agent_response})
 
-        # Generate TTS if enabled
-        audio_output = None
-        if tts_on and agent_response:
-            audio_bytes, tts_error = generate_tts(agent_response)
-            if audio_bytes and not tts_error:
-                # Save to temporary file for Gradio
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp:
-                    tmp.write(audio_bytes)
-                    audio_output = tmp.name
-
-        return (
+        # Show the reply first; TTS takes a while, so its audio comes after
+        yield (
             history,  # Updated chat history
             "",  # Clear text input
-            audio_output,  # TTS audio
+            None,  # TTS audio (sent in the next update)
             "",  # Clear confirmation message
             None,  # Clear pending confirmation
             gr.update(visible=False),  # Hide confirmation row
@@ -282,14 +349,37 @@ def create_chat_interface(page_name: str) -> dict:
             None   # Clear video upload
         )
 
+        # Generate TTS if enabled (cached per response text)
+        if tts_on and agent_response:
+            audio_output = _get_tts_path(agent_response)
+            if audio_output:
+                # Only the audio changes; leave anything typed since untouched
+                yield (
+                    history,
+                    gr.update(),
+                    audio_output,  # TTS audio
+                    gr.update(),
+                    None,
+                    gr.update(),
+                    gr.update(),
+                    gr.update(),
+                    gr.update()
+                )
+
     def handle_confirmation_yes(
-        history: List[Tuple[str, str]],
+        history: List[Dict[str, str]],
         pending_data: Optional[Dict],
         tts_on: bool
-    ) -> Tuple[List[Tuple[str, str]], Dict, Dict, Optional[str], Optional[str]]:
-        """Handle user confirming the action."""
+    ) -> Iterator[Tuple[List[Dict[str, str]], Dict, None, Optional[str], Optional[str]]]:
+        """
+        Handle user confirming the action.
+
+        Like handle_message, the result is yielded first and its TTS audio,
+        if any, follows in a second update.
+        """
         if not pending_data:
-            return history, gr.update(visible=False), None, None, ""
+            yield history, gr.update(visible=False), None, None, ""
+            return
 
         # Send confirmation to backend
         response, error = send_confirmation(
@@ -305,28 +395,29 @@ def create_chat_interface(page_name: str) -> dict:
             # If execution failed and there's a specific error, show that instead
             if response.get("error") and not response.get("execution_success", True):
                 backend_response = f"❌ {response.get('error', error)}"
-            history = history + [["[Confirmation]", backend_response]]
-            return history, gr.update(visible=False), None, None, ""
+            history.append({"role": "user", "content": "[Confirmation]"})
+            history.append({"role": "assistant", "content": backend_response})
+            yield history, gr.update(visible=False), None, None, ""
+            return
 
         # Add agent response
         agent_response = response.get("response", "Action completed.")
-        history = history + [["[Confirmed]", agent_response]]
+        history.append({"role": "user", "content": "[Confirmed]"})
+        history.append({"role": "assistant", "content": agent_response})
 
-        # Generate TTS if enabled
-        audio_output = None
-        if tts_on and agent_response:
-            audio_bytes, tts_error = generate_tts(agent_response)
-            if audio_bytes and not tts_error:
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp:
-                    tmp.write(audio_bytes)
-                    audio_output = tmp.name
+        # Show the result first; TTS takes a while, so its audio comes after
+        yield history, gr.update(visible=False), None, None, ""
 
-        return history, gr.update(visible=False), None, audio_output, ""
+        # Generate TTS if enabled (cached per response text)
+        if tts_on and agent_response:
+            audio_output = _get_tts_path(agent_response)
+            if audio_output:
+                yield history, gr.update(), None, audio_output, gr.update()
 
     def handle_confirmation_no(
-        history: List[Tuple[str, str]],
+        history: List[Dict[str, str]],
         pending_data: Optional[Dict]
-    ) -> Tuple[List[Tuple[str, str]], Dict, Optional[str]]:
+    ) -> Tuple[List[Dict[str, str]], Dict, Optional[str]]:
         """Handle user cancelling the action."""
         if not pending_data:
             return history, gr.update(visible=False), None
@@ -347,7 +438,8 @@ def create_chat_interface(page_name: str) -> dict:
                 agent_response = f"Error: {error}"
         else:
             agent_response = response.get("response", "Action cancelled.")
-        history = history + [["[Cancelled]", agent_response]]
+        history.append({"role": "user", "content": "[Cancelled]"})
+        history.append({"role": "assistant", "content": agent_response})
 
         return history, gr.update(visible=False), None
 
@@ -386,13 +478,6 @@ def create_chat_interface(page_name: str) -> dict:
         outputs=[chatbot, session_id_state, tts_audio, confirmation_row, pending_confirmation_state]
     )
 
-    # Update TTS enabled state
-    tts_enabled.change(
-        fn=lambda x: x,
-        inputs=[tts_enabled],
-        outputs=[tts_enabled_state]
-    )
-
     # Return components for external access
     return {
         "column": chat_col,
@@ -162,9 +162,14 @@ def main():
     server_name = os.getenv("GRADIO_SERVER_NAME", "0.0.0.0")
     server_port = int(os.getenv("GRADIO_SERVER_PORT", "7860"))
     share = os.getenv("GRADIO_SHARE", "false").lower() == "true"
+    # How many calls of each event handler run at once across all users.
+    # Gradio's default is 1, so every user would wait on whichever agent or
+    # TTS request is in flight
+    concurrency_limit = int(os.getenv("GRADIO_CONCURRENCY_LIMIT", "10"))
 
     # Create and launch app
     app = create_app()
+    app.queue(default_concurrency_limit=concurrency_limit)
 
     print(f"""
     ╔════════════════════════════════════════════════════════════════╗